@@ -0,0 +1,182 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from board_state import BoardState
+from capture_reader import iter_frames
+from timeline import TimelineBuilder
+
+CAPTURE_EXTENSIONS = (".json", ".jsonl", ".cnc")
+GAME_FIELDS = ["file", "match_id", "starting_team", "winner", "finished", "from_start", "turns", "reveals",
+               "assassin_hit", "cards_per_turn", "snapshots"]
+
+
+def find_captures(paths):
+    """Expand files and directories into the list of capture files to analyze."""
+    captures = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                captures.extend(os.path.join(directory, name) for name in sorted(names)
+                                if name.endswith(CAPTURE_EXTENSIONS))
+        else:
+            captures.append(path)
+    return captures
+
+
+def _new_game(path, match_id, starting_team, from_start):
+    return {"file": path, "match_id": match_id, "starting_team": starting_team, "winner": None, "finished": False,
+            "from_start": from_start, "turns": 1, "reveals": 0, "assassin_hit": False, "snapshots": 0}
+
+
+def _finish_game(game):
+    game["cards_per_turn"] = round(game["reveals"] / game["turns"], 3) if game["turns"] else 0.0
+    return game
+
+
+def summarize_capture(path):
+    """Stream one capture file and summarize every game it contains from its timeline events.
+
+    The starting team is read from the card counts of the board, so it is
+    right for captures that begin mid-game too; `from_start` tells whether
+    the first snapshot of the game had no revealed cards.
+    """
+    games = []
+    game = None
+    state = BoardState()
+    timeline = TimelineBuilder()
+
+    for frame in iter_frames(path):
+        if not state.apply(frame["G"]):
+            continue
+
+        for event in timeline.observe(state, frame.get("timestamp")):
+            if event.kind == "game":
+                if game is not None:
+                    games.append(_finish_game(game))
+                game = _new_game(path, event.match_id, state.board().starting_team or event.team,
+                                 state.fingerprint[1] == 0)
+            elif event.kind == "reveal":
+                game["reveals"] += 1
+                if event.color == "black":
+                    game["assassin_hit"] = True
+            elif event.kind == "turn":
+                game["turns"] += 1
+            elif event.kind == "game_over":
+                game["finished"] = True
+                game["winner"] = event.team
+        game["snapshots"] += 1
+
+    if game is not None:
+        games.append(_finish_game(game))
+    return games
+
+
+def aggregate(games):
+    """Reduce per-game summaries into archive statistics."""
+    finished = [game for game in games if game["finished"]]
+    # Turn and reveal averages only count games captured from the first to the last snapshot
+    complete = [game for game in finished if game["from_start"]]
+    total_turns = sum(game["turns"] for game in complete)
+    total_reveals = sum(game["reveals"] for game in complete)
+
+    by_starting_team = {}
+    for team in ("red", "blue"):
+        started = [game for game in finished if game["starting_team"] == team and game["winner"]]
+        wins = sum(1 for game in started if game["winner"] == team)
+        by_starting_team[team] = {"games": len(started), "wins": wins,
+                                  "win_rate": round(wins / len(started), 3) if started else None}
+
+    return {
+        "games": len(games),
+        "finished_games": len(finished),
+        "complete_games": len(complete),
+        "avg_turns_per_game": round(total_turns / len(complete), 3) if complete else None,
+        "assassin_hits": sum(1 for game in games if game["assassin_hit"]),
+        "avg_cards_per_turn": round(total_reveals / total_turns, 3) if total_turns else None,
+        "win_rate_by_starting_team": by_starting_team,
+    }
+
+
+def _summarize_or_fail(path):
+    """Summarize a capture file; returns the games and None, or no games and the error."""
+    try:
+        return summarize_capture(path), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def analyze_archive(paths, workers=None):
+    """Summarize capture files in parallel and return the games and the aggregate statistics.
+
+    A file that cannot be read is listed in the `errors` of the statistics
+    instead of stopping the analysis.
+    """
+    captures = find_captures(paths)
+    started_at = time.perf_counter()
+
+    games = []
+    errors = []
+    if workers == 1:
+        results = list(map(_summarize_or_fail, captures))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_summarize_or_fail, captures))
+    for path, (games_of_file, error) in zip(captures, results):
+        games.extend(games_of_file)
+        if error:
+            errors.append({"file": path, "error": error})
+
+    elapsed = time.perf_counter() - started_at
+    statistics = aggregate(games)
+    statistics["files"] = len(captures)
+    statistics["errors"] = errors
+    statistics["elapsed_seconds"] = round(elapsed, 3)
+    statistics["files_per_second"] = round(len(captures) / elapsed, 1) if elapsed else None
+    return games, statistics
+
+
+def write_games_csv(games, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=GAME_FIELDS)
+        writer.writeheader()
+        writer.writerows(games)
+
+
+def add_archive_arguments(parser):
+    """Arguments of the archive analysis, shared with `codenames_analyzer.py analyze-archive`."""
+    parser.add_argument('paths', nargs='+', help='Capture files or directories containing them')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--csv', type=str, help='Write one row per game to this CSV file')
+    parser.add_argument('--json', type=str, help='Write the aggregate statistics and games to this JSON file')
+
+
+def run_archive(args):
+    games, statistics = analyze_archive(args.paths, workers=args.workers)
+    for error in statistics["errors"]:
+        print(f"Skipped {error['file']}: {error['error']}", file=sys.stderr)
+
+    if args.csv:
+        write_games_csv(games, args.csv)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"statistics": statistics, "games": games}, f, indent=2)
+
+    json.dump(statistics, sys.stdout, indent=2)
+    print()
+    return 1 if statistics["errors"] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze an archive of Codenames captures')
+    add_archive_arguments(parser)
+    return run_archive(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
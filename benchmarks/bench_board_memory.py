@@ -0,0 +1,59 @@
+"""Memory and build time per snapshot of the Board type and the card data dictionary.
+
+Run from the repository root:
+
+    python benchmarks/bench_board_memory.py
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from board_state import Board  # noqa: E402
+from simulator import synthetic_game_states  # noqa: E402
+
+
+def deep_size(obj, seen=None):
+    """Approximate size in bytes of an object and everything it references.
+
+    Strings shared with the snapshot (the words) are counted as well, so both
+    structures are measured the same way.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Board memory benchmark")
+    parser.add_argument("--number", type=int, default=2000, help="Builds per timing")
+    args = parser.parse_args()
+
+    game_data = list(synthetic_game_states(30))[-1]
+    board = Board.from_game_data(game_data)
+    card_data = board.to_card_data()
+
+    board_time = min(timeit.repeat(lambda: Board.from_game_data(game_data), number=args.number, repeat=3))
+    dict_time = min(timeit.repeat(lambda: Board.from_game_data(game_data).to_card_data(),
+                                  number=args.number, repeat=3))
+
+    print(f"{'structure':<22} {'bytes/snapshot':>15} {'build us':>10}")
+    print(f"{'Board':<22} {deep_size(board):>15} {board_time / args.number * 1e6:10.1f}")
+    print(f"{'card data dictionary':<22} {deep_size(card_data):>15} {dict_time / args.number * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Capture size and analysis time with and without deduplication of repeated game states.
+
+A synthetic capture, in which every state is re-broadcast `--ticks` times like
+the real server does, is written once as captured before and once through
+`CaptureDeduplicator`. For both the number of stored frames, the file size
+and the time of a full analysis pass (`archive_analyzer.summarize_capture`)
+are reported, and the game summaries of both files are checked to agree.
+
+Run from the repository root:
+
+    python benchmarks/bench_dedup.py --frames 30000 --ticks 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_analyzer import summarize_capture  # noqa: E402
+from capture_format import CAPTURE_FORMATS, INDEX_SUFFIX  # noqa: E402
+from simulator import write_capture  # noqa: E402
+
+
+def capture_size(path):
+    size = os.path.getsize(path)
+    if os.path.exists(path + INDEX_SUFFIX):
+        size += os.path.getsize(path + INDEX_SUFFIX)
+    return size
+
+
+def analysis_time(path, repeat=3):
+    best = None
+    games = None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        games = summarize_capture(path)
+        elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+    return best, games
+
+
+def comparable(games):
+    return [{key: value for key, value in game.items() if key not in ("file", "snapshots")} for game in games]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplication benchmark")
+    parser.add_argument("--frames", type=int, default=30000, help="Frames of the synthetic capture")
+    parser.add_argument("--ticks", type=int, default=3, help="Repeated frames per game state")
+    parser.add_argument("--formats", nargs="+", choices=CAPTURE_FORMATS, default=list(CAPTURE_FORMATS),
+                        help="Capture formats to measure")
+    args = parser.parse_args()
+
+    print(f"{'format':<8} {'dedup':<6} {'frames':>8} {'bytes':>12} {'analysis s':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for capture_format in args.formats:
+            results = {}
+            for dedup in (False, True):
+                path = os.path.join(directory, f"{capture_format}-{dedup}.capture")
+                written = write_capture(path, args.frames, ticks=args.ticks, capture_format=capture_format,
+                                        dedup=dedup)
+                elapsed, games = analysis_time(path)
+                results[dedup] = (written, capture_size(path), elapsed, games)
+                print(f"{capture_format:<8} {'yes' if dedup else 'no':<6} {written:>8} {results[dedup][1]:>12} "
+                      f"{elapsed:11.3f}")
+
+            plain, deduplicated = results[False], results[True]
+            print(f"{capture_format:<8} {'saved':<6} {1 - deduplicated[0] / plain[0]:>8.0%} "
+                  f"{1 - deduplicated[1] / plain[1]:>12.0%} {1 - deduplicated[2] / plain[2]:>11.0%}")
+            if comparable(plain[3]) != comparable(deduplicated[3]):
+                print(f"Game summaries of the {capture_format} captures differ")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Microbenchmark of the frame decoder against the original regex path.
+
+Run from the repository root:
+
+    python benchmarks/bench_frame_decoder.py --number 2000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_decoder import JSON_BACKEND, _decode_payload, decode_game_state  # noqa: E402
+from simulator import encode_frame, synthetic_game_states  # noqa: E402
+
+
+def legacy_decode(payload):
+    if isinstance(payload, str) and "42/codenames" in payload:
+        match = re.search(r'42/codenames,(.*)', payload)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, list) or len(data) < 3 or "G" not in data[2]:
+            return None
+        game_data = data[2]["G"]
+        if game_data.get("matchID") is None:
+            return None
+        return game_data
+    return None
+
+
+def cold_decode(frame):
+    _decode_payload.cache_clear()
+    return decode_game_state(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame decoder microbenchmark")
+    parser.add_argument("--number", type=int, default=2000, help="Decodes per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measurements")
+    args = parser.parse_args()
+
+    state_frame = encode_frame(list(synthetic_game_states(30))[-1])
+    other_frame = '42/codenames,["chat",{"message":"hello"}]'
+
+    cases = [
+        ("legacy, game state", lambda: legacy_decode(state_frame)),
+        ("decoder, game state (cold)", lambda: cold_decode(state_frame)),
+        ("decoder, game state (cached)", lambda: decode_game_state(state_frame)),
+        ("legacy, other frame", lambda: legacy_decode(other_frame)),
+        ("decoder, other frame", lambda: decode_game_state(other_frame)),
+    ]
+
+    print(f"JSON backend: {JSON_BACKEND}, frame size: {len(state_frame)} bytes")
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print(f"{name:<30} {best / args.number * 1e6:10.2f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
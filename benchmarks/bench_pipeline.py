@@ -0,0 +1,130 @@
+"""Offline benchmark of the analysis pipeline on synthetic captures.
+
+For every capture size a synthetic capture is written with the simulator and
+then replayed through the pipeline. Reported are the frames per second of
+the whole pass, the mean latency of each stage and the peak memory of a
+separate pass measured with tracemalloc. Captures larger than
+`--render-max-frames` are replayed without the render and prompt stages.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --sizes 100 1000 10000 100000 1000000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console  # noqa: E402
+
+from board_state import BoardState  # noqa: E402
+from capture_format import CAPTURE_FORMATS  # noqa: E402
+from capture_reader import iter_frames  # noqa: E402
+from codenames_analyzer import generate_ai_prompt, render_card_colors  # noqa: E402
+from frame_decoder import _decode_payload  # noqa: E402
+from simulator import replay, write_capture  # noqa: E402
+
+STAGES = ("read", "apply", "fingerprint", "evaluate", "render", "prompt")
+
+
+def timed_pass(path, team="red", language="en", render=True):
+    """Replay a capture, timing every stage separately; `render=False` skips the render and prompt stages."""
+    totals = dict.fromkeys(STAGES, 0.0)
+    counts = dict.fromkeys(STAGES, 0)
+    console = Console(file=io.StringIO(), width=100)
+    board = BoardState()
+    fingerprint = None
+    clock = time.perf_counter
+
+    frames = iter_frames(path)
+    started_at = clock()
+    while True:
+        stage_start = clock()
+        frame = next(frames, None)
+        now = clock()
+        if frame is None:
+            break
+        totals["read"] += now - stage_start
+        counts["read"] += 1
+
+        board.apply(frame["G"])
+        stage_start, now = now, clock()
+        totals["apply"] += now - stage_start
+        counts["apply"] += 1
+
+        changed = board.fingerprint != fingerprint
+        stage_start, now = now, clock()
+        totals["fingerprint"] += now - stage_start
+        counts["fingerprint"] += 1
+        if not changed:
+            continue
+        fingerprint = board.fingerprint
+
+        card_data = board.card_data()
+        stage_start, now = now, clock()
+        totals["evaluate"] += now - stage_start
+        counts["evaluate"] += 1
+        if not render:
+            continue
+
+        console.print(render_card_colors(card_data))
+        console.file.seek(0)
+        console.file.truncate()
+        stage_start, now = now, clock()
+        totals["render"] += now - stage_start
+        counts["render"] += 1
+
+        generate_ai_prompt(card_data, team, language)
+        totals["prompt"] += clock() - now
+        counts["prompt"] += 1
+
+    elapsed = clock() - started_at
+    latencies = {stage: totals[stage] / counts[stage] if counts[stage] else None for stage in STAGES}
+    return board.snapshot_count, elapsed, latencies
+
+
+def peak_memory(path):
+    """Peak traced memory of a replay pass without rendering."""
+    # Without this a capture smaller than the decoder cache is decoded entirely from the cache
+    _decode_payload.cache_clear()
+    tracemalloc.start()
+    replay(iter_frames(path), on_board=lambda card_data: None)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis pipeline benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Capture sizes in frames")
+    parser.add_argument("--format", choices=CAPTURE_FORMATS, default="compact", help="Capture storage format")
+    parser.add_argument("--ticks", type=int, default=3, help="Repeated frames per game state")
+    parser.add_argument("--render-max-frames", type=int, default=20000,
+                        help="Largest capture that is rendered and prompted for every board change")
+    args = parser.parse_args()
+
+    header = f"{'frames':>9} {'file MB':>8} {'frames/s':>10} " + " ".join(f"{stage + ' us':>14}" for stage in STAGES)
+    print(header + f" {'peak MB':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"capture-{size}")
+            write_capture(path, size, ticks=args.ticks, capture_format=args.format)
+            file_size = os.path.getsize(path) / 1e6
+
+            frames, elapsed, latencies = timed_pass(path, render=size <= args.render_max_frames)
+            peak = peak_memory(path) / 1e6
+            rate = frames / elapsed if elapsed else 0
+            stages = " ".join(f"{latencies[stage] * 1e6:14.1f}" if latencies[stage] is not None else f"{'-':>14}"
+                              for stage in STAGES)
+            print(f"{frames:>9} {file_size:8.1f} {rate:10.0f} {stages} {peak:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
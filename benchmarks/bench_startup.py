@@ -0,0 +1,91 @@
+"""Start-up cost of the offline commands against the imports of the capture path.
+
+Every command is run in a fresh interpreter with `-X importtime`; the import
+time is the sum of the cumulative times of the top-level imports. The
+`eager imports` row loads what `codenames_analyzer` imported at module load
+before the subcommands existed (Playwright, rich and pyperclip).
+
+Exits with status 1 if an offline command imports one of those modules or
+needs more than `--max-ratio` of the eager import time.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from simulator import write_capture  # noqa: E402
+
+SCRIPT = os.path.join(ROOT, "codenames_analyzer.py")
+HEAVY_MODULES = ("playwright", "rich", "pyperclip")
+EAGER_IMPORTS = "import codenames_analyzer, playwright.async_api, rich.console, rich.live, pyperclip"
+
+
+def import_profile(arguments):
+    """Run a command with `-X importtime`; return the wall time, import time and imported modules."""
+    started_at = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime"] + arguments, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    wall_time = time.perf_counter() - started_at
+
+    import_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):
+            import_us += int(cumulative)
+    return wall_time, import_us, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start-up benchmark of the offline commands")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command")
+    parser.add_argument("--max-ratio", type=float, default=0.5,
+                        help="Largest allowed import time of an offline command relative to the eager imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        capture = os.path.join(directory, "capture.json")
+        write_capture(capture, 200)
+
+        commands = {
+            "eager imports": ["-c", EAGER_IMPORTS],
+            "analyze --json": [SCRIPT, "analyze", capture, "--json", "--no-cache"],
+            "prompt": [SCRIPT, "prompt", capture, "--team", "red", "--lang", "en", "--no-cache"],
+        }
+
+        results = {}
+        for name, arguments in commands.items():
+            runs = [import_profile(arguments) for _ in range(args.runs)]
+            results[name] = (statistics.median(run[0] for run in runs), statistics.median(run[1] for run in runs),
+                             runs[0][2])
+
+    eager_import_us = results["eager imports"][1]
+    failed = False
+    print(f"{'command':<16} {'wall ms':>9} {'import ms':>10} {'ratio':>6}  heavy modules")
+    for name, (wall_time, import_us, modules) in results.items():
+        heavy = sorted({module.split(".")[0] for module in modules if module.split(".")[0] in HEAVY_MODULES})
+        ratio = import_us / eager_import_us
+        print(f"{name:<16} {wall_time * 1000:9.1f} {import_us / 1000:10.1f} {ratio:6.2f}  {', '.join(heavy) or '-'}")
+        if name != "eager imports" and (heavy or ratio > args.max_ratio):
+            failed = True
+
+    if failed:
+        print("Offline commands import heavy modules or start too slowly")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
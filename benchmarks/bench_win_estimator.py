@@ -0,0 +1,40 @@
+"""Latency of the Monte Carlo win-probability and clue-risk estimates.
+
+Run from the repository root:
+
+    python benchmarks/bench_win_estimator.py --playouts 100000 1000000 --workers 1 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from win_estimator import simulate  # noqa: E402
+
+# Hidden red, blue, neutral and assassin cards of a new board
+NEW_BOARD = (9, 8, 7, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Win estimator benchmark")
+    parser.add_argument("--playouts", type=int, nargs="+", default=[100000, 1000000], help="Playouts per query")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Process pool sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best is reported")
+    args = parser.parse_args()
+
+    print(f"{'playouts':>9} {'workers':>8} {'seconds':>9} {'playouts/s':>12} {'red wins':>9}")
+    for playouts in args.playouts:
+        for workers in args.workers:
+            best = None
+            for _ in range(args.repeat):
+                started_at = time.perf_counter()
+                wins, _, _ = simulate(NEW_BOARD, "red", playouts, workers=workers, seed=0)
+                elapsed = time.perf_counter() - started_at
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{playouts:>9} {workers:>8} {best:9.3f} {playouts / best:12.0f} {wins[0] / playouts:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
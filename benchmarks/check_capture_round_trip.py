@@ -0,0 +1,62 @@
+"""Check that the compact capture format reads back exactly what the JSONL format stores.
+
+A synthetic capture, with lobby states that empty or drop `animTokens` mixed
+in, is written in both formats; every `G` snapshot read back from the compact
+file must equal the one read back from the JSONL file. Small blocks are used
+so that deltas cross block boundaries.
+
+Run from the repository root:
+
+    python benchmarks/check_capture_round_trip.py --frames 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture_format import open_capture_sink  # noqa: E402
+from capture_reader import iter_frames  # noqa: E402
+from simulator import SIMULATED_URL, encode_frame, synthetic_game_states  # noqa: E402
+
+
+def game_states(count, seed):
+    """Synthetic snapshots, with the board cleared or removed now and then, as in the lobby between games."""
+    for number, game_data in enumerate(synthetic_game_states(count, seed=seed, ticks=2)):
+        yield game_data
+        if number % 97 == 0:
+            yield dict(game_data, animTokens=[])
+        elif number % 89 == 0:
+            yield {key: value for key, value in game_data.items() if key != "animTokens"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact capture round-trip check")
+    parser.add_argument("--frames", type=int, default=5000, help="Synthetic game states")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the simulated games")
+    parser.add_argument("--flush-size", type=int, default=16, help="Frames per compact block")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {}
+        for capture_format in ("jsonl", "compact"):
+            paths[capture_format] = os.path.join(directory, f"round-trip.{capture_format}")
+            with open_capture_sink(paths[capture_format], capture_format, mode="w",
+                                   flush_size=args.flush_size) as sink:
+                for number, game_data in enumerate(game_states(args.frames, args.seed)):
+                    sink.write({"url": SIMULATED_URL, "data": encode_frame(game_data), "timestamp": float(number)})
+
+        expected = [frame["G"] for frame in iter_frames(paths["jsonl"])]
+        actual = [frame["G"] for frame in iter_frames(paths["compact"])]
+
+    mismatches = [number for number, (left, right) in enumerate(zip(expected, actual)) if left != right]
+    print(f"{len(expected)} JSONL frames, {len(actual)} compact frames, {len(mismatches)} differ")
+    if mismatches or len(expected) != len(actual):
+        if mismatches:
+            print(f"First difference at frame {mismatches[0]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import hashlib
+from collections import namedtuple
+
+BOARD_WIDTH = 5
+BOARD_SIZE = 25
+COLORS = ("unknown", "red", "blue", "gray", "black")
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+
+HiddenCards = namedtuple("HiddenCards", ["own", "opponent", "neutral", "assassin"])
+
+
+def other_team(team):
+    return "blue" if team == "red" else "red"
+
+
+def hidden_cards(card_data, team):
+    """Return the hidden words of the card data of `Board.to_card_data`, grouped as seen by `team`."""
+    all_cards = card_data["all_cards"]
+
+    def hidden(words):
+        return [word for word in words if word and not all_cards[word]["revealed"]]
+
+    return HiddenCards(hidden(card_data.get(f"{team}_cards", [])),
+                       hidden(card_data.get(f"{other_team(team)}_cards", [])),
+                       hidden(card_data.get("gray_cards", [])),
+                       hidden([card_data.get("black_card")]))
+
+
+def is_board_snapshot(game_data):
+    """Check whether a `G` payload carries a board that can be evaluated."""
+    return isinstance(game_data, dict) and bool(game_data.get("animTokens"))
+
+
+def board_position(location):
+    """Board position of a `wordCard` location, or None if the card is not on the board."""
+    if location.get("name") != "board":
+        return None
+    position = location.get("y", 0) * BOARD_WIDTH + location.get("x", 0)
+    return position if 0 <= position < BOARD_SIZE else None
+
+
+def snapshot_fingerprint(game_data):
+    """Cheap fingerprint of the parts of a snapshot that change the analysis.
+
+    Covers the match, the revealed cards (as a bitmask of board positions), the
+    scores, the current team and the game over flag, plus the token count so
+    that newly visible card colors are noticed too.
+    """
+    anim_tokens = game_data.get("animTokens", [])
+    revealed = 0
+    for token in anim_tokens:
+        if token.get("type") == "wordCard" and token.get("data", {}).get("revealed", False):
+            position = board_position(token.get("location", {}))
+            if position is not None:
+                revealed |= 1 << position
+
+    score = game_data.get("score", {})
+    return (game_data.get("matchID"), revealed, score.get("red", 0), score.get("blue", 0),
+            game_data.get("currentTeam", game_data.get("turn")), bool(game_data.get("gameOver", False)),
+            len(anim_tokens))
+
+
+def snapshot_digest(game_data):
+    """Content hash of the parts of a snapshot that matter to the analysis.
+
+    Covers the match, every card with its position, word, color and revealed
+    flag, the scores, the current team and the game over flag; the order of
+    the tokens and any other field are ignored. Two snapshots with the same
+    digest describe the same game state.
+    """
+    cards = []
+    for token in game_data.get("animTokens", []):
+        token_type = token.get("type")
+        if token_type == "wordCard":
+            location = token.get("location", {})
+            token_data = token.get("data", {})
+            cards.append(f"w{location.get('x')},{location.get('y')},{location.get('name')},"
+                         f"{token_data.get('word')},{bool(token_data.get('revealed', False))}")
+        elif token_type == "coverCard":
+            cards.append(f"c{token.get('id')}")
+    cards.sort()
+
+    score = game_data.get("score", {})
+    state = (f"{game_data.get('matchID')}|{game_data.get('currentTeam', game_data.get('turn'))}|"
+             f"{bool(game_data.get('gameOver', False))}|{score.get('red', 0)}|{score.get('blue', 0)}|")
+    return hashlib.blake2b((state + "|".join(cards)).encode("utf-8"), digest_size=16).digest()
+
+
+class Board:
+    """Compact, array-backed view of one board snapshot.
+
+    Words are kept in a fixed 25-slot list indexed by position, colors as one
+    code per slot, and revealed cards as well as each color as position
+    bitmasks. Lookups by position and by word are O(1); `to_card_data` gives
+    the dictionary layout used by `print_card_colors` and `generate_ai_prompt`.
+    """
+
+    __slots__ = ("words", "colors", "revealed", "color_masks", "turn", "red_remaining", "blue_remaining",
+                 "game_over", "_positions")
+
+    def __init__(self, words, colors, revealed, turn="unknown", red_remaining=0, blue_remaining=0,
+                 game_over=False):
+        self.words = words
+        self.colors = colors
+        self.revealed = revealed
+        self.turn = turn
+        self.red_remaining = red_remaining
+        self.blue_remaining = blue_remaining
+        self.game_over = game_over
+
+        self.color_masks = [0] * len(COLORS)
+        self._positions = {}
+        for position, word in enumerate(words):
+            if word is not None:
+                self.color_masks[colors[position]] |= 1 << position
+                self._positions.setdefault(word, position)
+
+    @classmethod
+    def from_game_data(cls, game_data):
+        """Build a board from a `G` snapshot."""
+        words = [None] * BOARD_SIZE
+        colors = bytearray(BOARD_SIZE)
+        revealed = 0
+
+        for token in game_data.get("animTokens", []):
+            token_type = token.get("type")
+            if token_type == "wordCard":
+                position = board_position(token.get("location", {}))
+                if position is not None:
+                    token_data = token.get("data", {})
+                    words[position] = token_data.get("word", "")
+                    if token_data.get("revealed", False):
+                        revealed |= 1 << position
+            elif token_type == "coverCard":
+                parts = token.get("id", "").split("/")
+                if len(parts) >= 3 and parts[0] == "coverCard" and parts[2].isdigit():
+                    position = int(parts[2])
+                    if position < BOARD_SIZE:
+                        colors[position] = COLOR_CODES.get(parts[1], 0)
+
+        score = game_data.get("score", {})
+        return cls(words, colors, revealed,
+                   turn=game_data.get("currentTeam", game_data.get("turn", "unknown")),
+                   red_remaining=score.get("red", 0),
+                   blue_remaining=score.get("blue", 0),
+                   game_over=bool(game_data.get("gameOver", False)))
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, word):
+        return word in self._positions
+
+    def position_of(self, word):
+        """Return the board position of a word, or None if it is not on the board."""
+        return self._positions.get(word)
+
+    def word_at(self, position):
+        return self.words[position]
+
+    def color_at(self, position):
+        return COLORS[self.colors[position]]
+
+    def is_revealed(self, position):
+        return bool(self.revealed >> position & 1)
+
+    def positions(self, color, revealed=None):
+        """Yield the occupied positions of a color in board order.
+
+        With `revealed` set to True or False only revealed or hidden cards are
+        returned.
+        """
+        mask = self.color_masks[COLOR_CODES[color]]
+        if revealed is True:
+            mask &= self.revealed
+        elif revealed is False:
+            mask &= ~self.revealed
+        while mask:
+            low_bit = mask & -mask
+            yield low_bit.bit_length() - 1
+            mask ^= low_bit
+
+    def cards(self, color, revealed=None):
+        """Return the words of a color in board order, see `positions`."""
+        return [self.words[position] for position in self.positions(color, revealed)]
+
+    @property
+    def starting_team(self):
+        """The team that started the game, the one with 9 cards against 8, or None if the counts are equal."""
+        red = self.red_remaining + bin(self.color_masks[COLOR_CODES["red"]] & self.revealed).count("1")
+        blue = self.blue_remaining + bin(self.color_masks[COLOR_CODES["blue"]] & self.revealed).count("1")
+        if red == blue:
+            return None
+        return "red" if red > blue else "blue"
+
+    @property
+    def complete(self):
+        """True if every slot holds a word with a known color."""
+        return None not in self.words and self.color_masks[0] == 0
+
+    def to_card_data(self):
+        """Return the card data dictionary used by the display and prompt functions."""
+        black_cards = self.cards("black")
+        all_cards = {}
+        for position, word in enumerate(self.words):
+            if word is not None and word not in all_cards:
+                all_cards[word] = {
+                    "position": position,
+                    "color": COLORS[self.colors[position]],
+                    "revealed": bool(self.revealed >> position & 1),
+                }
+
+        return {
+            "red_cards": self.cards("red"),
+            "blue_cards": self.cards("blue"),
+            "black_card": black_cards[0] if black_cards else None,
+            "gray_cards": self.cards("gray"),
+            "all_cards": all_cards,
+            "turn": self.turn,
+            "red_remaining": self.red_remaining,
+            "blue_remaining": self.blue_remaining,
+            "game_over": self.game_over
+        }
+
+    def to_json(self):
+        """Return a compact JSON-serializable form of the board."""
+        return {
+            "words": self.words,
+            "colors": [COLORS[code] for code in self.colors],
+            "revealed": self.revealed,
+            "turn": self.turn,
+            "red_remaining": self.red_remaining,
+            "blue_remaining": self.blue_remaining,
+            "game_over": self.game_over
+        }
+
+
+class BoardState:
+    """Latest Codenames board, kept up to date one `G` snapshot at a time.
+
+    Every `G` payload is a full snapshot of the game, so applying one simply
+    replaces the previous board. The board and its card data are built lazily
+    and cached, so the current board is available without replaying earlier
+    snapshots.
+    """
+
+    def __init__(self):
+        self.game_data = None
+        self.snapshot_count = 0
+        self._board = None
+        self._card_data = None
+        self._fingerprint = None
+
+    def apply(self, game_data):
+        """Fold a `G` snapshot into the state. Returns False if it has no board."""
+        if not is_board_snapshot(game_data):
+            return False
+
+        self.game_data = game_data
+        self.snapshot_count += 1
+        self._board = None
+        self._card_data = None
+        self._fingerprint = None
+        return True
+
+    @property
+    def ready(self):
+        return self.game_data is not None
+
+    @property
+    def game_over(self):
+        return self.ready and bool(self.game_data.get("gameOver", False))
+
+    @property
+    def fingerprint(self):
+        """Fingerprint of the latest snapshot, see `snapshot_fingerprint`."""
+        if self._fingerprint is None and self.game_data is not None:
+            self._fingerprint = snapshot_fingerprint(self.game_data)
+        return self._fingerprint
+
+    @property
+    def complete(self):
+        """True once the board has all of its cards with known colors."""
+        board = self.board()
+        return board is not None and board.complete
+
+    def board(self):
+        """Return the `Board` of the latest snapshot, or None if none was applied."""
+        if self._board is None and self.game_data is not None:
+            self._board = Board.from_game_data(self.game_data)
+        return self._board
+
+    def card_data(self):
+        """Return the card data for the latest snapshot, or None if none was applied."""
+        if self._card_data is None and self.game_data is not None:
+            self._card_data = self.board().to_card_data()
+        return self._card_data
@@ -0,0 +1,67 @@
+import time
+
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+
+async def block_resources(context, resource_types=BLOCKED_RESOURCE_TYPES):
+    """Abort requests for resources that are not needed to follow the game."""
+
+    async def handle_route(route):
+        if route.request.resource_type in resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle_route)
+
+
+class BrowserSession:
+    """A page to capture from, together with the browser that owns it.
+
+    Depending on the options the browser is launched fresh, launched with a
+    persistent profile directory (so caches and cookies survive between runs)
+    or attached to an already running Chromium over CDP. `launch_time` is the
+    number of seconds it took until the page was ready.
+    """
+
+    def __init__(self, browser, context, page, mode, launch_time):
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.mode = mode
+        self.launch_time = launch_time
+
+    @classmethod
+    async def open(cls, playwright, browser_visible=False, user_data_dir=None, cdp_url=None,
+                   block_media=False):
+        started_at = time.monotonic()
+
+        if cdp_url:
+            browser = await playwright.chromium.connect_over_cdp(cdp_url)
+            context = browser.contexts[0] if browser.contexts else await browser.new_context()
+            mode = "cdp"
+        elif user_data_dir:
+            browser = None
+            context = await playwright.chromium.launch_persistent_context(
+                user_data_dir, headless=not browser_visible, devtools=browser_visible)
+            mode = "persistent"
+        else:
+            browser = await playwright.chromium.launch(headless=not browser_visible, devtools=browser_visible)
+            context = await browser.new_context()
+            mode = "launch"
+
+        if block_media:
+            await block_resources(context)
+
+        page = await context.new_page()
+        return cls(browser, context, page, mode, time.monotonic() - started_at)
+
+    async def close(self):
+        """Close what this session opened; an attached browser is left running."""
+        if self.mode == "cdp":
+            await self.page.close()
+            await self.browser.close()
+        elif self.mode == "persistent":
+            await self.context.close()
+        else:
+            await self.browser.close()
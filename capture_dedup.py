@@ -0,0 +1,62 @@
+from board_state import snapshot_digest
+
+
+class CaptureDeduplicator:
+    """Drop captured messages whose game state repeats the message before.
+
+    The server re-broadcasts the same `G` state for animations, reconnects
+    and other players' UI events. Messages are compared by `snapshot_digest`,
+    so only exact repeats of the game state are dropped, and a state that
+    comes back later is kept. Nothing is lost silently: a kept message is held
+    back until the state changes (or `flush`), and is then written to `sink`
+    with `repeats`, the number of dropped copies, and `last_timestamp`, the
+    time of the last copy, if there were any.
+
+    With `enabled=False` every message is written straight through.
+    """
+
+    def __init__(self, sink, enabled=True):
+        self.sink = sink
+        self.enabled = enabled
+        self.frames = 0
+        self.duplicates = 0
+        self.duplicate_bytes = 0
+        self._digest = None
+        self._pending = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def add(self, message, game_data):
+        """Write a message unless its state repeats the previous one. Returns True if the state is new."""
+        self.frames += 1
+        if not self.enabled:
+            self.sink.write(message)
+            return True
+
+        digest = snapshot_digest(game_data)
+        if digest == self._digest:
+            self.duplicates += 1
+            self.duplicate_bytes += len(message.get("data") or "")
+            self._pending["repeats"] = self._pending.get("repeats", 0) + 1
+            self._pending["last_timestamp"] = message.get("timestamp")
+            return False
+
+        self.flush()
+        self._digest = digest
+        self._pending = message
+        return True
+
+    def flush(self):
+        """Write the held back message; the next message is then kept in any case."""
+        if self._pending is not None:
+            self.sink.write(self._pending)
+            self._pending = None
+        self._digest = None
+
+    @property
+    def duplicate_ratio(self):
+        return self.duplicates / self.frames if self.frames else 0.0
@@ -0,0 +1,306 @@
+import gzip
+import json
+import os
+import struct
+import time
+from bisect import bisect_right
+
+from capture_sink import CaptureSink
+from frame_decoder import decode_game_state, json_loads
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CAPTURE_FORMATS = ("jsonl", "compact")
+COMPACT_MAGIC = b"CNCAP1\n"
+INDEX_SUFFIX = ".idx"
+BLOCK_HEADER = struct.Struct(">I")
+
+
+def default_codec():
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def compress_block(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress_block(data, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("The zstandard package is required to read this capture.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _token_ids(anim_tokens):
+    ids = [token.get("id") if isinstance(token, dict) else None for token in anim_tokens]
+    if None in ids or len(set(ids)) != len(ids):
+        return None
+    return ids
+
+
+def diff_game_state(previous, current):
+    """Describe the changes from one `G` snapshot to the next.
+
+    Top-level keys are compared as a whole, except for `animTokens`, which is
+    diffed per token id so that only the cards that changed are stored.
+    """
+    delta = {}
+
+    changed = {key: value for key, value in current.items()
+               if key != "animTokens" and previous.get(key) != value}
+    removed = [key for key in previous if key not in current]
+
+    # A removed `animTokens` key is listed in `del` like any other key
+    if "animTokens" in current:
+        previous_tokens = previous.get("animTokens")
+        current_tokens = current["animTokens"]
+        previous_ids = _token_ids(previous_tokens) if previous_tokens is not None else None
+        current_ids = _token_ids(current_tokens)
+
+        if previous_ids is None or current_ids is None:
+            if previous_tokens != current_tokens:
+                changed["animTokens"] = current_tokens
+        else:
+            previous_by_id = dict(zip(previous_ids, previous_tokens))
+            tokens = {token_id: token for token_id, token in zip(current_ids, current_tokens)
+                      if previous_by_id.get(token_id) != token}
+            if tokens:
+                delta["tokens"] = tokens
+            if current_ids != previous_ids:
+                delta["order"] = current_ids
+
+    if changed:
+        delta["set"] = changed
+    if removed:
+        delta["del"] = removed
+    return delta
+
+
+def apply_delta(previous, delta):
+    """Rebuild a `G` snapshot from the previous one and a delta."""
+    game_data = dict(previous)
+    for key in delta.get("del", ()):
+        game_data.pop(key, None)
+    game_data.update(delta.get("set", {}))
+
+    if ("tokens" in delta or "order" in delta) and "animTokens" not in delta.get("del", ()):
+        previous_tokens = previous.get("animTokens", [])
+        tokens = {token["id"]: token for token in previous_tokens}
+        tokens.update(delta.get("tokens", {}))
+        order = delta["order"] if "order" in delta else [token["id"] for token in previous_tokens]
+        game_data["animTokens"] = [tokens[token_id] for token_id in order]
+
+    return game_data
+
+
+class CompactCaptureSink(CaptureSink):
+    """Capture sink writing delta-encoded, compressed blocks with an offset index.
+
+    Each flush writes one block. The first frame of a block holds the full `G`
+    snapshot and the following ones only hold the delta to the frame before,
+    so any frame can be rebuilt by decoding a single block. The offset, first
+    frame number and first timestamp of every block are appended to a sidecar
+    index file for random access.
+    """
+
+    def __init__(self, path, mode="a", codec=None, **kwargs):
+        self.codec = codec or default_codec()
+        self.frame_count = 0
+        self._previous = None
+        self._previous_url = None
+        self._index_file = None
+        super().__init__(path, mode=mode, **kwargs)
+
+    def _open(self, path, mode):
+        f = open(path, mode + "b")
+        entries = []
+        if f.tell() == 0:
+            header = json.dumps({"version": 1, "codec": self.codec}).encode("utf-8")
+            f.write(COMPACT_MAGIC + header + b"\n")
+        else:
+            self.codec = read_header(path)["codec"]
+            entries = read_index(path)
+            self.frame_count = sum(entry["count"] for entry in entries)
+
+        self._index_file = open(path + INDEX_SUFFIX, "w", encoding="utf-8")
+        for entry in entries:
+            self._index_file.write(json.dumps(entry) + "\n")
+        return f
+
+    def _encode(self, record):
+        game_data = record.get("G")
+        if game_data is None:
+            game_data = decode_game_state(record.get("data"))
+
+        entry = {"t": record.get("timestamp")}
+        if record.get("url") != self._previous_url:
+            entry["url"] = record.get("url")
+        if record.get("repeats"):
+            entry["r"] = record["repeats"]
+
+        if self._previous is None:
+            entry["G"] = game_data
+        else:
+            entry["d"] = diff_game_state(self._previous, game_data)
+
+        self._previous = game_data
+        self._previous_url = record.get("url")
+        return entry
+
+    def flush(self):
+        with self._lock:
+            if self._buffer:
+                data = "\n".join(json.dumps(entry) for entry in self._buffer).encode("utf-8")
+                block = compress_block(data, self.codec)
+                offset = self._file.tell()
+                self._file.write(BLOCK_HEADER.pack(len(block)) + block)
+                self.bytes_written += BLOCK_HEADER.size + len(block)
+
+                index_entry = {"offset": offset, "length": len(block), "first": self.frame_count,
+                               "count": len(self._buffer), "t0": self._buffer[0]["t"]}
+                self._index_file.write(json.dumps(index_entry) + "\n")
+                self.frame_count += len(self._buffer)
+
+                self._buffer = []
+                self._previous = None
+                self._previous_url = None
+            self._file.flush()
+            self._index_file.flush()
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        self._index_file.close()
+
+
+def is_compact_capture(path):
+    """Check the magic bytes of a capture file."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(COMPACT_MAGIC)) == COMPACT_MAGIC
+    except OSError:
+        return False
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(COMPACT_MAGIC)) != COMPACT_MAGIC:
+            raise ValueError(f"{path} is not a compact capture file")
+        return json.loads(f.readline())
+
+
+def read_index(path):
+    """Load the block index of a compact capture, rebuilding it if it is missing."""
+    index_path = path + INDEX_SUFFIX
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return rebuild_index(path)
+
+
+def rebuild_index(path):
+    """Rebuild the block index by walking the length-prefixed blocks of the file."""
+    header = read_header(path)
+    entries = []
+    first = 0
+    with open(path, "rb") as f:
+        f.seek(len(COMPACT_MAGIC))
+        f.readline()
+        while True:
+            offset = f.tell()
+            size_bytes = f.read(BLOCK_HEADER.size)
+            if len(size_bytes) < BLOCK_HEADER.size:
+                break
+            (length,) = BLOCK_HEADER.unpack(size_bytes)
+            block = f.read(length)
+            if len(block) < length:
+                break
+            lines = decompress_block(block, header["codec"]).split(b"\n")
+            entries.append({"offset": offset, "length": length, "first": first, "count": len(lines),
+                            "t0": json_loads(lines[0])["t"]})
+            first += len(lines)
+    return entries
+
+
+class CompactCaptureReader:
+    """Random access to the frames of a compact capture file.
+
+    Frames are addressed by number (0-based, in capture order) or timestamp;
+    only the block containing the requested frame is decompressed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.codec = read_header(path)["codec"]
+        self.index = read_index(path)
+        self._firsts = [entry["first"] for entry in self.index]
+        self._timestamps = [entry["t0"] for entry in self.index]
+        self._cached_block = None
+        self._cached_frames = None
+
+    def __len__(self):
+        if not self.index:
+            return 0
+        return self.index[-1]["first"] + self.index[-1]["count"]
+
+    def _block_frames(self, block_number):
+        if self._cached_block != block_number:
+            entry = self.index[block_number]
+            with open(self.path, "rb") as f:
+                f.seek(entry["offset"] + BLOCK_HEADER.size)
+                data = decompress_block(f.read(entry["length"]), self.codec)
+
+            frames = []
+            game_data = None
+            url = None
+            for line in data.split(b"\n"):
+                record = json_loads(line)
+                game_data = record["G"] if "G" in record else apply_delta(game_data, record["d"])
+                url = record.get("url", url)
+                frames.append({"url": url, "timestamp": record["t"], "G": game_data, "repeats": record.get("r", 0)})
+
+            self._cached_block = block_number
+            self._cached_frames = frames
+        return self._cached_frames
+
+    def frame(self, number):
+        """Return the frame with the given number as a dict with `url`, `timestamp` and `G`."""
+        if number < 0:
+            number += len(self)
+        if not 0 <= number < len(self):
+            raise IndexError(f"frame {number} out of range")
+        block_number = bisect_right(self._firsts, number) - 1
+        return self._block_frames(block_number)[number - self._firsts[block_number]]
+
+    def frame_number_at(self, timestamp):
+        """Return the number of the last frame captured at or before `timestamp`, or None."""
+        block_number = bisect_right(self._timestamps, timestamp) - 1
+        if block_number < 0:
+            return None
+        frames = self._block_frames(block_number)
+        position = bisect_right([frame["timestamp"] for frame in frames], timestamp) - 1
+        return self._firsts[block_number] + position
+
+    def __iter__(self):
+        for block_number in range(len(self.index)):
+            yield from self._block_frames(block_number)
+
+    def reversed(self):
+        """Iterate over the frames from last to first, one block at a time."""
+        for block_number in range(len(self.index) - 1, -1, -1):
+            yield from reversed(self._block_frames(block_number))
+
+
+def open_capture_sink(path, capture_format="jsonl", **kwargs):
+    """Create the capture sink for a storage format."""
+    if capture_format == "compact":
+        return CompactCaptureSink(path, **kwargs)
+    return CaptureSink(path, **kwargs)
@@ -0,0 +1,101 @@
+import os
+
+from capture_format import CompactCaptureReader, is_compact_capture
+from frame_decoder import decode_game_state, json_loads
+
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def extract_game_state(message):
+    """Return the `G` payload of a captured message, or None if it has none."""
+    if not isinstance(message, dict):
+        return None
+    return decode_game_state(message.get("data"))
+
+
+def iter_messages(path, on_invalid=None):
+    """Stream captured messages from a JSONL file, one line at a time.
+
+    Lines that are not valid JSON are skipped; `on_invalid` is called with the
+    offending line if given.
+    """
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json_loads(line)
+            except ValueError:
+                if on_invalid:
+                    on_invalid(line)
+
+
+def iter_frames(path, on_invalid=None):
+    """Stream the frames of a capture file as dicts with `url`, `timestamp`, `G` and `repeats`.
+
+    Both the JSONL and the compact capture formats are supported; messages
+    without a `G` payload are skipped. `repeats` is the number of identical
+    states dropped after the frame by a `CaptureDeduplicator`.
+    """
+    if is_compact_capture(path):
+        yield from CompactCaptureReader(path)
+        return
+
+    for message in iter_messages(path, on_invalid):
+        game_data = extract_game_state(message)
+        if game_data is not None:
+            yield {"url": message.get("url"), "timestamp": message.get("timestamp"), "G": game_data,
+                   "repeats": message.get("repeats", 0)}
+
+
+def iter_game_states(path, on_invalid=None):
+    """Stream the decoded `G` payloads of a capture file in order."""
+    for frame in iter_frames(path, on_invalid):
+        yield frame["G"]
+
+
+def iter_lines_reversed(path, block_size=TAIL_BLOCK_SIZE):
+    """Yield the non-empty lines of a file from last to first.
+
+    The file is read backwards in fixed-size blocks, so memory use is bounded
+    by the block size and the longest line.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line.decode("utf-8")
+        if remainder.strip():
+            yield remainder.decode("utf-8")
+
+
+def tail_game_state(path, accept=None, block_size=TAIL_BLOCK_SIZE):
+    """Find the last `G` payload of a capture file without parsing earlier lines.
+
+    `accept` can be used to skip snapshots that are not usable; by default the
+    last `G` payload found is returned. Returns None if there is none.
+    """
+    if is_compact_capture(path):
+        for frame in CompactCaptureReader(path).reversed():
+            if accept is None or accept(frame["G"]):
+                return frame["G"]
+        return None
+
+    for line in iter_lines_reversed(path, block_size):
+        try:
+            message = json_loads(line)
+        except ValueError:
+            continue
+        game_data = extract_game_state(message)
+        if game_data is not None and (accept is None or accept(game_data)):
+            return game_data
+    return None
@@ -0,0 +1,114 @@
+import json
+import queue
+import threading
+import time
+
+FLUSH_SIZE = 64
+FLUSH_INTERVAL = 1.0
+QUEUE_SIZE = 1024
+
+_CLOSE = object()
+
+
+class CaptureSink:
+    """Buffered writer for captured messages in JSONL format.
+
+    The file is opened once and records are written in batches, either when
+    `flush_size` records are buffered or `flush_interval` seconds have passed
+    since the last flush. With `background=True` records are handed to a
+    writer thread through a bounded queue; when the queue is full the record is
+    dropped and counted in `dropped` instead of blocking the caller.
+    """
+
+    def __init__(self, path, mode="a", flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 background=False, queue_size=QUEUE_SIZE):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self.closed = False
+
+        self._file = self._open(path, mode)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+
+        if background:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._run, name="capture-sink", daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, record):
+        """Queue a record for writing. Returns False if it was dropped."""
+        if self.closed:
+            self.dropped += 1
+            return False
+
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            return True
+
+        self._append(record)
+        return True
+
+    def flush(self):
+        """Write out buffered records."""
+        with self._lock:
+            if self._buffer:
+                data = "".join(self._buffer)
+                self._file.write(data)
+                self.bytes_written += len(data)
+                self._buffer = []
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        """Write out every pending record and close the file."""
+        if self.closed:
+            return
+        self.closed = True
+
+        if self._thread is not None:
+            self._queue.put(_CLOSE)
+            self._thread.join()
+
+        self.flush()
+        self._file.close()
+
+    def _open(self, path, mode):
+        return open(path, mode, encoding="utf-8")
+
+    def _encode(self, record):
+        return json.dumps(record) + "\n"
+
+    def _append(self, record):
+        self._buffer.append(self._encode(record))
+        self.written += 1
+        if len(self._buffer) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _run(self):
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+                continue
+
+            if record is _CLOSE:
+                return
+            self._append(record)
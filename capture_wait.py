@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+
+class CaptureWaiter:
+    """Decide when a capture has collected enough data.
+
+    Snapshots are reported with `on_snapshot` from the frame handler. Waiting
+    ends at the first complete board or at game over (each can be turned off),
+    after `idle_timeout` seconds without a new snapshot once data has started
+    arriving, or after `max_wait_time` seconds (never if it is None). Only
+    boards that were applied successfully should be reported.
+    """
+
+    def __init__(self, max_wait_time, stop_on_board=True, stop_on_game_over=True, idle_timeout=None):
+        self.max_wait_time = max_wait_time
+        self.stop_on_board = stop_on_board
+        self.stop_on_game_over = stop_on_game_over
+        self.idle_timeout = idle_timeout
+        self.reason = None
+        self.snapshot_count = 0
+        self.created_at = time.monotonic()
+        self.first_snapshot_at = None
+        self.last_snapshot_at = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def time_to_first_snapshot(self):
+        """Seconds from the start of the capture to the first usable snapshot, or None."""
+        if self.first_snapshot_at is None:
+            return None
+        return self.first_snapshot_at - self.created_at
+
+    def on_snapshot(self, board):
+        """Record a new snapshot and check the exit conditions against the board."""
+        now = time.monotonic()
+        if self.first_snapshot_at is None:
+            self.first_snapshot_at = now
+            self._wakeup.set()
+        self.last_snapshot_at = now
+        self.snapshot_count += 1
+
+        if self.stop_on_game_over and board.game_over:
+            self._finish("game_over")
+        elif self.stop_on_board and board.complete:
+            self._finish("board")
+
+    async def wait(self):
+        """Wait until an exit condition is met and return its reason.
+
+        The wait ends as soon as `on_snapshot` finishes it; the idle and
+        maximum wait times are only checked when their deadline passes, or
+        when the first snapshot starts the idle timeout.
+        """
+        started_at = time.monotonic()
+        while True:
+            timeout = self._next_timeout(started_at)
+            if timeout is None:
+                return self.reason
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), None if timeout == float("inf") else timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _next_timeout(self, started_at):
+        """Return how long the next wait may last, or None once waiting is over."""
+        if self.reason is not None:
+            return None
+
+        now = time.monotonic()
+        remaining = float("inf")
+        if self.max_wait_time is not None:
+            remaining = self.max_wait_time - (now - started_at)
+            if remaining <= 0:
+                self._finish("timeout")
+                return None
+
+        if self.idle_timeout is not None and self.last_snapshot_at is not None:
+            idle_remaining = self.idle_timeout - (now - self.last_snapshot_at)
+            if idle_remaining <= 0:
+                self._finish("idle")
+                return None
+            remaining = min(remaining, idle_remaining)
+
+        return remaining
+
+    def _finish(self, reason):
+        if self.reason is None:
+            self.reason = reason
+            self._wakeup.set()
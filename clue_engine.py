@@ -0,0 +1,197 @@
+from collections import namedtuple
+
+import numpy as np
+
+from board_state import hidden_cards
+from languages import lowercase
+
+ClueSuggestion = namedtuple("ClueSuggestion", ["clue", "count", "targets", "margin", "score"])
+
+MAX_COUNT = 4
+MIN_MARGIN = 0.05
+NEUTRAL_WEIGHT = 0.8
+ASSASSIN_WEIGHT = 1.2
+MARGIN_WEIGHT = 2.0
+CANDIDATE_FACTOR = 20
+CHUNK_ROWS = 32768
+
+
+def normalize_rows(vectors):
+    """Scale every row to unit length so that dot products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class WordVectors:
+    """In-memory word vectors with the lookup interface used by `ClueEngine`.
+
+    `vectors` holds one normalized row per word, `clue_mask` marks the rows
+    that may be used as clues. Words are looked up lowercased by the rules of
+    `language`.
+    """
+
+    def __init__(self, vocabulary, vectors, language=None):
+        self.vocabulary = vocabulary
+        self.language = language
+        self.vectors = vectors
+        self.clue_mask = np.array([word.isalpha() for word in vocabulary], dtype=bool)
+        self._index = {word: row for row, word in enumerate(vocabulary)}
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def lookup(self, word):
+        """Return the row of a word, or None if it is not in the vocabulary."""
+        return self._index.get(lowercase(word, self.language))
+
+    def word(self, row):
+        return self.vocabulary[row]
+
+    @classmethod
+    def from_text_file(cls, path, limit=None, language=None):
+        """Load a word2vec/GloVe text file.
+
+        An optional word2vec header line (`count dimensions`) is skipped and
+        words are lowercased by the rules of `language`. With `limit` only the
+        first words of the file, usually the most frequent, are read.
+        """
+        vocabulary = []
+        rows = []
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line_number, line in enumerate(f):
+                parts = line.rstrip().split(" ")
+                if line_number == 0 and len(parts) == 2:
+                    continue
+                if rows and len(parts) - 1 != len(rows[0]):
+                    continue
+                vocabulary.append(lowercase(parts[0], language))
+                rows.append(parts[1:])
+                if limit and len(vocabulary) >= limit:
+                    break
+        return cls(vocabulary, normalize_rows(np.array(rows, dtype=np.float32)), language)
+
+
+class ClueEngine:
+    """Rank clue words for a board with batched similarity scoring over word embeddings.
+
+    The similarity of every vocabulary word to every hidden board word is
+    computed with matrix products over chunks of the vocabulary, so float16 or
+    memory-mapped vectors are converted one chunk at a time. For each
+    candidate clue the own-team similarities are sorted, and the clue is given
+    the largest count whose weakest target is still more similar than the most
+    dangerous other card (opponent, neutral scaled by `NEUTRAL_WEIGHT`,
+    assassin scaled by `ASSASSIN_WEIGHT`) by at least `MIN_MARGIN`. No clue
+    is ranked while an opponent or assassin word has no vector, as its danger
+    could not be measured.
+    """
+
+    def __init__(self, word_vectors, max_clues=None):
+        self.word_vectors = word_vectors
+        self.vectors = word_vectors.vectors
+        self.language = word_vectors.language
+        self.max_clues = min(max_clues or len(word_vectors), len(word_vectors))
+        self.clue_mask = np.asarray(word_vectors.clue_mask[:self.max_clues], dtype=bool)
+
+    @classmethod
+    def from_text_file(cls, path, limit=None, max_clues=None, language=None):
+        return cls(WordVectors.from_text_file(path, limit, language), max_clues=max_clues)
+
+    def word_vector(self, word):
+        """Return the normalized vector of a board word, or None if it is unknown.
+
+        Words with several parts ("ICE CREAM") fall back to the mean of their parts.
+        """
+        word = lowercase(word, self.language)
+        row = self.word_vectors.lookup(word)
+        if row is not None:
+            return np.asarray(self.vectors[row], dtype=np.float32)
+
+        rows = [self.word_vectors.lookup(part) for part in word.replace("-", " ").split()]
+        rows = [row for row in rows if row is not None]
+        if not rows:
+            return None
+        return normalize_rows(np.mean([self.vectors[row] for row in rows], axis=0)[None, :])[0]
+
+    def unknown_words(self, words):
+        """Return the words without a vector, which `suggest` cannot take into account."""
+        return [word for word in words if self.word_vector(word) is None]
+
+    def _group_vectors(self, words):
+        known = []
+        vectors = []
+        for word in words:
+            vector = self.word_vector(word)
+            if vector is not None:
+                known.append(word)
+                vectors.append(vector)
+        matrix = np.array(vectors, dtype=np.float32).reshape(len(vectors), self.vectors.shape[1])
+        return known, matrix
+
+    def suggest(self, own_words, opponent_words, neutral_words=(), assassin_words=(), top=10,
+                max_count=MAX_COUNT, min_margin=MIN_MARGIN):
+        """Return up to `top` ranked `ClueSuggestion`s for the given hidden board words.
+
+        Raises ValueError if an opponent or assassin word has no vector.
+        """
+        unknown = self.unknown_words(list(opponent_words) + list(assassin_words))
+        if unknown:
+            raise ValueError(f"No word vector for {', '.join(unknown)}, the risk of a clue cannot be measured")
+
+        own, own_matrix = self._group_vectors(own_words)
+        if not own:
+            return []
+
+        groups = [self._group_vectors(words)[1] for words in (opponent_words, neutral_words, assassin_words)]
+        board_matrix = np.vstack([own_matrix] + groups)
+        similarities = np.empty((self.max_clues, len(board_matrix)), dtype=np.float32)
+        for chunk_start in range(0, self.max_clues, CHUNK_ROWS):
+            chunk = np.asarray(self.vectors[chunk_start:min(chunk_start + CHUNK_ROWS, self.max_clues)],
+                               dtype=np.float32)
+            similarities[chunk_start:chunk_start + len(chunk)] = chunk @ board_matrix.T
+
+        own_count = len(own)
+        own_similarities = similarities[:, :own_count]
+        own_sorted = -np.sort(-own_similarities, axis=1)
+
+        danger = np.full(self.max_clues, -1.0, dtype=np.float32)
+        start = own_count
+        for matrix, weight in zip(groups, (1.0, NEUTRAL_WEIGHT, ASSASSIN_WEIGHT)):
+            if len(matrix):
+                danger = np.maximum(danger, similarities[:, start:start + len(matrix)].max(axis=1) * weight)
+            start += len(matrix)
+
+        max_count = min(max_count, own_count)
+        margins = own_sorted[:, :max_count] - danger[:, None]
+        valid = margins > min_margin
+        counts = np.where(valid.any(axis=1), max_count - np.argmax(valid[:, ::-1], axis=1), 0)
+        best_margin = np.where(counts > 0, margins[np.arange(self.max_clues), np.maximum(counts - 1, 0)], -np.inf)
+        scores = counts + MARGIN_WEIGHT * best_margin
+        scores[~self.clue_mask | (counts == 0)] = -np.inf
+
+        candidates = min(top * CANDIDATE_FACTOR, self.max_clues)
+        candidate_ids = np.argpartition(-scores, candidates - 1)[:candidates]
+        candidate_ids = candidate_ids[np.argsort(-scores[candidate_ids])]
+
+        board_words = [lowercase(word, self.language) for word in list(own_words) + list(opponent_words) + list(neutral_words)
+                       + list(assassin_words)]
+        suggestions = []
+        for clue_id in candidate_ids:
+            if not np.isfinite(scores[clue_id]):
+                break
+            clue = self.word_vectors.word(clue_id)
+            if any(clue in word or word in clue for word in board_words):
+                continue
+            count = int(counts[clue_id])
+            targets = [own[position] for position in np.argsort(-own_similarities[clue_id])[:count]]
+            suggestions.append(ClueSuggestion(clue, count, targets, float(best_margin[clue_id]),
+                                              float(scores[clue_id])))
+            if len(suggestions) >= top:
+                break
+        return suggestions
+
+    def suggest_for_board(self, card_data, team, **kwargs):
+        """Suggest clues for `team` from the card data of `evaluate_card_colors`."""
+        cards = hidden_cards(card_data, team)
+        return self.suggest(cards.own, cards.opponent, cards.neutral, cards.assassin, **kwargs)
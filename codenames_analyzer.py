@@ -1,166 +1,301 @@
-from playwright.sync_api import sync_playwright, TimeoutError
 import time
-import json
 import os
-import re
+import sys
+import json
 import argparse
-import pyperclip
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from languages import LANGUAGES
-
-console = Console()
-
-
-def capture_websocket_data(target_url, username="Player", browser_visible=False, max_wait_time=30):
-    """Capture WebSocket data from a Codenames game."""
+import hashlib
+from collections import namedtuple
+from languages import LANGUAGES, get_prompt_template
+from board_state import BoardState, is_board_snapshot
+from capture_reader import extract_game_state, tail_game_state
+from frame_decoder import decode_payload, extract_payload, is_game_state_payload
+from capture_format import CAPTURE_FORMATS, open_capture_sink
+from capture_sink import CaptureSink
+from capture_dedup import CaptureDeduplicator
+from result_cache import ResultCache, board_key, capture_key
+from metrics import NULL_METRICS, Metrics
+from timeline import TimelineBuilder, load_timeline, timeline_path, turns
+from game_history import HISTORY_FILE, GameHistory
+from archive_analyzer import add_archive_arguments, run_archive
+
+
+class LazyConsole:
+    """Rich console created on first use, so that commands which never print with rich do not import it."""
+
+    def __init__(self):
+        self._console = None
+
+    def get(self):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+console = LazyConsole()
+
+WAIT_REASONS = {
+    "board": "complete board",
+    "game_over": "game over",
+    "idle": "idle timeout",
+    "timeout": "maximum wait time",
+}
+
+CACHE_FILE = "codenames_data/result_cache.sqlite"
+METRICS_FILE = "codenames_data/metrics.json"
+PROFILE_FILE = "codenames_data/profile.prof"
+
+CAPTURE_FILES = {
+    "jsonl": "codenames_data/codenames_messages.json",
+    "compact": "codenames_data/codenames_messages.cnc",
+}
+
+
+# How the browser is started, see `BrowserSession.open`
+BrowserOptions = namedtuple("BrowserOptions", ["browser_visible", "user_data_dir", "cdp_url", "block_media"],
+                            defaults=(False, None, None, False))
+# When the capture stops, see `CaptureWaiter`; `live` follows the game until Ctrl+C, `confirm_setup` asks whether
+# the player has joined a team
+WaitOptions = namedtuple("WaitOptions", ["max_wait_time", "stop_on_board", "stop_on_game_over", "idle_timeout",
+                                         "live", "confirm_setup"], defaults=(30, True, True, None, False, True))
+# Where the frames go: the capture file (default: `CAPTURE_FILES` of the format), written from a background thread
+# with `background_writer`, without repeated states with `dedup` (see `CaptureDeduplicator`), and the game history
+# (see `GameHistory`, None to skip it)
+StorageOptions = namedtuple("StorageOptions", ["capture_format", "capture_file", "background_writer", "dedup",
+                                               "history_file"], defaults=("jsonl", None, False, True, HISTORY_FILE))
+
+
+def capture_websocket_data(target_url, **kwargs):
+    """Capture WebSocket data from a Codenames game.
+
+    Synchronous wrapper around `capture_websocket_data_async`.
+    """
+    import asyncio
+
+    return asyncio.run(capture_websocket_data_async(target_url, **kwargs))
+
+
+async def capture_websocket_data_async(target_url, username="Player", browser=BrowserOptions(),
+                                       waiting=WaitOptions(), storage=StorageOptions(), on_board=None,
+                                       metrics=NULL_METRICS):
+    """Capture WebSocket data from a Codenames game using the asyncio Playwright API.
+
+    Frames are queued by the WebSocket callback and processed by a consumer
+    task in the same event loop; `on_board` is called with the card data
+    every time the board changes. Returns the stored messages, the last
+    `BoardState` and whether the game is over.
+    """
+
+    import asyncio
+    from playwright.async_api import async_playwright, TimeoutError
+    from rich.panel import Panel
+    from browser_setup import BrowserSession
+    from capture_wait import CaptureWaiter
 
     os.makedirs("codenames_data", exist_ok=True)
 
-    with open("codenames_data/codenames_messages.json", "w") as f:
-        f.write("")
-
     console.print(Panel(f"[bold blue]CODENAMES ANALYSIS TOOL[/bold blue]", subtitle="v1.0"))
     console.print(f"[yellow]Target URL:[/yellow] {target_url}")
 
-    with sync_playwright() as p:
-
-        browser = p.chromium.launch(headless=not browser_visible, devtools=browser_visible)
-        context = browser.new_context()
-        page = context.new_page()
-
-        codenames_messages = []
-        found_codenames_message = False
-        game_over = False
-        game_data = None
-
-        def handle_websocket(websocket):
-            console.print(f"[green]WebSocket connected:[/green] {websocket.url}")
-            websocket.on("framereceived", lambda payload: handle_frame(websocket.url, payload))
-
-        def handle_frame(url, payload):
-            nonlocal found_codenames_message, game_data, game_over, codenames_messages
-
-            try:
-
-                if isinstance(payload, str) and "42/codenames" in payload:
-
-                    match = re.search(r'42/codenames,(.*)', payload)
-                    if not match:
-                        return
-
-                    json_str = match.group(1)
-
+    started_at = time.monotonic()
+    capture_file = storage.capture_file or CAPTURE_FILES[storage.capture_format]
+    timeline = TimelineBuilder()
+    previous_board = BoardState()
+    if os.path.exists(capture_file) and previous_board.apply(tail_game_state(capture_file, accept=is_board_snapshot)):
+        # The capture and its timeline are appended to, so continue from the last stored board
+        timeline.resume(previous_board)
+
+    async with async_playwright() as p:
+        with open_capture_sink(capture_file, storage.capture_format, mode="a",
+                               background=storage.background_writer) as sink, \
+                CaptureDeduplicator(sink, enabled=storage.dedup) as deduplicator, \
+                CaptureSink(timeline_path(capture_file), mode="a") as timeline_sink:
+
+            session = await BrowserSession.open(p, **browser._asdict())
+            page = session.page
+            console.print(f"[green]Browser ready ({session.mode}) in {session.launch_time:.2f} seconds[/green]")
+
+            codenames_messages = []
+            game_over = False
+            board = BoardState()
+            if waiting.live:
+                waiter = CaptureWaiter(None, stop_on_board=False, stop_on_game_over=False)
+            else:
+                waiter = CaptureWaiter(waiting.max_wait_time, stop_on_board=waiting.stop_on_board,
+                                       stop_on_game_over=waiting.stop_on_game_over,
+                                       idle_timeout=waiting.idle_timeout)
+            frame_queue = asyncio.Queue()
+            history = GameHistory(storage.history_file) if storage.history_file else None
+
+            def handle_websocket(websocket):
+                console.print(f"[green]WebSocket connected:[/green] {websocket.url}")
+                websocket.on("framereceived",
+                             lambda payload: frame_queue.put_nowait((websocket.url, payload, time.time(),
+                                                                     time.perf_counter())))
+
+            async def consume_frames():
+                nonlocal game_over
+                fingerprint = None
+
+                while True:
+                    url, payload, timestamp, received_at = await frame_queue.get()
+                    metrics.observe("capture", time.perf_counter() - received_at)
+                    metrics.count("frames_received")
                     try:
-                        data = json.loads(json_str)
-
-                        if not isinstance(data, list) or len(data) < 3:
-                            return
-
-                        if "G" not in data[2]:
-                            return
-
-                        game_data = data[2]["G"]
-
-                        if game_data.get("matchID") is None:
-                            return
+                        with metrics.timer("filter"):
+                            game_payload = extract_payload(payload)
+                            if game_payload is not None and not is_game_state_payload(game_payload):
+                                game_payload = None
+                        if game_payload is None:
+                            metrics.count("frames_filtered")
+                            continue
+
+                        with metrics.timer("decode"):
+                            game_data = decode_payload(game_payload)
+                        if game_data is None:
+                            metrics.count("frames_undecodable")
+                            continue
+                        metrics.count("game_states")
 
                         message_data = {
                             "url": url,
                             "data": payload,
-                            "timestamp": time.time()
+                            "timestamp": timestamp
                         }
+                        with metrics.timer("write"):
+                            new_state = deduplicator.add(message_data, game_data)
+                        if not new_state:
+                            metrics.count("frames_duplicate")
+                            continue
                         codenames_messages.append(message_data)
-
-                        if game_data.get("gameOver", False):
+                        with metrics.timer("evaluate"):
+                            applied = board.apply(game_data)
+                        if not applied:
+                            # Lobby states without a board are stored, but there is nothing to evaluate
+                            continue
+                        waiter.on_snapshot(board)
+                        events = timeline.observe(board, timestamp)
+                        for event in events:
+                            timeline_sink.write(event)
+                        if history:
+                            with metrics.timer("history"):
+                                history.add(board, timestamp, events)
+
+                        if game_data.get("gameOver", False) and not game_over:
                             game_over = True
                             console.print("[bold red]Game over![/bold red]")
 
-                        with open("codenames_data/codenames_messages.json", "a") as f:
-                            json.dump(message_data, f)
-                            f.write("\n")
-                        found_codenames_message = True
-
-                    except json.JSONDecodeError:
-                        pass
+                        if on_board and board.fingerprint != fingerprint:
+                            fingerprint = board.fingerprint
+                            with metrics.timer("evaluate"):
+                                card_data = board.card_data()
+                            on_board(card_data)
+                            metrics.observe("frame_to_board", time.perf_counter() - received_at)
+                            metrics.count("board_updates")
 
-            except Exception as e:
-                console.print(f"[bold red]Error:[/bold red] {str(e)}")
+                    except Exception as e:
+                        metrics.count("errors")
+                        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+                    finally:
+                        frame_queue.task_done()
 
-        page.on("websocket", handle_websocket)
+            consumer = asyncio.create_task(consume_frames())
+            page.on("websocket", handle_websocket)
 
-        try:
-            page.goto(target_url, timeout=30000)
-            console.print("[bold green]✓ Page loaded successfully![/bold green]")
-        except TimeoutError:
-            console.print("[bold red]⚠ Warning: Page could not be loaded!")
-            return [], None, False
-
-        try:
-            page.fill('#nickname-input', username)
-            page.click('button[role="button"][type="submit"]')
-            console.print("[bold green]Username entered and joined room...[/bold green]")
-
-            page.wait_for_selector('div#gamescene', timeout=30000)
-            console.print("[bold green]✓ Game scene loaded successfully![/bold green]")
-        except TimeoutError:
-            console.print("[bold red]⚠ Warning: Game scene not found!")
-            return [], None, False
-        except Exception as e:
-            console.print(f"[bold red]⚠ Error: {str(e)}")
-            return [], None, False
+            try:
+                try:
+                    await page.goto(target_url, timeout=30000)
+                    console.print("[bold green]✓ Page loaded successfully![/bold green]")
+                except TimeoutError:
+                    console.print("[bold red]⚠ Warning: Page could not be loaded!")
+                    return [], board, False
+
+                try:
+                    await page.fill('#nickname-input', username)
+                    await page.click('button[role="button"][type="submit"]')
+                    console.print("[bold green]Username entered and joined room...[/bold green]")
+
+                    await page.wait_for_selector('div#gamescene', timeout=30000)
+                    console.print(f"[bold green]✓ Game scene loaded successfully! "
+                                  f"({time.monotonic() - started_at:.2f} seconds after start)[/bold green]")
+                except TimeoutError:
+                    console.print("[bold red]⚠ Warning: Game scene not found!")
+                    return [], board, False
+                except Exception as e:
+                    console.print(f"[bold red]⚠ Error: {str(e)}")
+                    return [], board, False
+
+                if waiting.confirm_setup:
+                    console.print(
+                        "[bold red]⚠ After the game scene is loaded, check if a player has entered a team or has "
+                        "been switched a team. If not, switch your team or join a team. \n[bold yellow]Confirm if "
+                        "this has been done. (Y/N): ")
+                    answer = await asyncio.get_running_loop().run_in_executor(None, input)
+                    setup_ready = answer.strip().lower() == 'y'
+
+                    if not setup_ready:
+                        console.print("[bold yellow]Setup not ready, please complete the setup and try again."
+                                      "[/bold yellow]")
+                        return [], board, False
+
+                if waiting.live:
+                    console.print("[bold yellow]Live mode: following the game, press Ctrl+C to stop.")
+                else:
+                    console.print(f"[bold yellow]Waiting for data... (up to {waiting.max_wait_time} seconds)")
+                reason = await waiter.wait()
+
+                await session.close()
+                await frame_queue.join()
+            finally:
+                consumer.cancel()
+                if history:
+                    history.close()
+
+            deduplicator.flush()
+            sink.close()
+            timeline_sink.close()
+
+    metrics.count("frames_written", sink.written)
+    metrics.count("bytes_written", sink.bytes_written)
+    metrics.count("frames_dropped", sink.dropped)
+    metrics.count("bytes_deduplicated", deduplicator.duplicate_bytes)
+
+    if deduplicator.duplicates:
+        console.print(f"[green]Skipped {deduplicator.duplicates} repeated game states "
+                      f"({deduplicator.duplicate_ratio:.0%} of {deduplicator.frames} frames, "
+                      f"{deduplicator.duplicate_bytes / 1024:.0f} KB not written)[/green]")
+
+    if sink.dropped:
+        console.print(f"[bold yellow]⚠ {sink.dropped} frames were dropped while writing to disk.[/bold yellow]")
 
+    if not codenames_messages:
+        console.print("[bold red]⚠ Warning: No WebSocket messages containing '42/codenames' received!")
+        console.print("[yellow]Possible reasons:[/yellow]")
+        console.print("1. The game may not have started yet")
+        console.print("2. WebSocket connection could not be established")
+        console.print("3. Insufficient wait time (can be increased with the --wait parameter)")
         console.print(
-            "[bold red]⚠ After the game scene is loaded, check if a player has entered a team or has been switched a "
-            "team. If not, switch your team or join a team. \n[bold yellow]Confirm if this has been done. (Y/N): ")
-        setup_ready = input().strip().lower() == 'y'
-
-        if not setup_ready:
-            console.print("[bold yellow]Setup not ready, please complete the setup and try again.[/bold yellow]")
-            return [], None, False
-
-        start_time = time.time()
-        while (time.time() - start_time) < max_wait_time:
-            if found_codenames_message:
-                console.print(f"[bold green]Receiving data... ({len(codenames_messages)} messages)")
-            else:
-                remaining = max_wait_time - (time.time() - start_time)
-                console.print(f"[bold yellow]Waiting for data... ({remaining:.0f} seconds remaining)")
-            time.sleep(2)
-
-        browser.close()
-
-        if not found_codenames_message:
-            console.print("[bold red]⚠ Warning: No WebSocket messages containing '42/codenames' received!")
-            console.print("[yellow]Possible reasons:[/yellow]")
-            console.print("1. The game may not have started yet")
-            console.print("2. WebSocket connection could not be established")
-            console.print("3. Insufficient wait time (can be increased with the --wait parameter)")
-            console.print(
-                "4. After the game scene is loaded, check if a player has entered a team or has been switched a team. "
-                "If not, switch your team or join a team. Confirm if this has been done.")
+            "4. After the game scene is loaded, check if a player has entered a team or has been switched a team. "
+            "If not, switch your team or join a team. Confirm if this has been done.")
+    else:
+        console.print(
+            f"[bold green]✓ Data collection completed! {len(codenames_messages)} codenames messages received.")
+        if waiter.time_to_first_snapshot is not None:
+            console.print(f"[green]First usable snapshot after {waiter.time_to_first_snapshot:.2f} seconds, "
+                          f"stopped by: {WAIT_REASONS[reason]}[/green]")
         else:
-            console.print(
-                f"[bold green]✓ Data collection completed! {len(codenames_messages)} codenames messages received.")
+            console.print(f"[bold yellow]⚠ No board was received, stopped by: {WAIT_REASONS[reason]}[/bold yellow]")
 
-        return codenames_messages, game_data, game_over
+    return codenames_messages, board, game_over
 
 
 def evaluate_card_colors(codenames_messages_file=None, messages=None):
     """Evaluate card colors from Codenames messages"""
 
-    result = {
-        "red_cards": [],
-        "blue_cards": [],
-        "black_card": None,
-        "gray_cards": [],
-        "all_cards": {},
-        "turn": None,
-        "red_remaining": 0,
-        "blue_remaining": 0,
-        "game_over": False
-    }
+    board = BoardState()
 
     try:
 
@@ -174,30 +309,14 @@ def evaluate_card_colors(codenames_messages_file=None, messages=None):
                 console.print(f"[bold red]Error: File {codenames_messages_file} is empty.[/bold red]")
                 return None
 
-            with open(codenames_messages_file, "r") as f:
-                file_content = f.read().strip()
-                if not file_content:
-                    console.print(f"[bold red]Error: File {codenames_messages_file} contains no data.[/bold red]")
-                    return None
-
-                f.seek(0)
-                messages = []
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-
-                            message_obj = json.loads(line)
-                            messages.append(message_obj)
-                        except json.JSONDecodeError:
-                            console.print(
-                                f"[bold yellow]Warning: Skipping invalid JSON line: {line[:50]}...[/bold yellow]")
-
-                if not messages:
-                    console.print(f"[bold red]Error: No valid messages found in {codenames_messages_file}.[/bold red]")
-                    return None
-
-        elif not messages:
+            board.apply(tail_game_state(codenames_messages_file, accept=is_board_snapshot))
+
+        elif messages:
+            for message in reversed(messages):
+                if board.apply(extract_game_state(message)):
+                    break
+
+        else:
             console.print("[bold red]Error: No message data found![/bold red]")
             return None
 
@@ -205,111 +324,30 @@ def evaluate_card_colors(codenames_messages_file=None, messages=None):
         console.print(f"[bold red]Error reading file: {str(e)}[/bold red]")
         return None
 
-    card_data_found = False
-    for message in messages:
-        data = message.get("data", "")
-        if not isinstance(data, str) or "42/codenames" not in data:
-            continue
-
-        match = re.search(r'42/codenames,(.*)', data)
-        if not match:
-            continue
-
-        json_str = match.group(1)
-
-        try:
-            data = json.loads(json_str)
-
-            if not isinstance(data, list) or len(data) < 3:
-                continue
-
-            if "G" not in data[2]:
-                continue
-
-            game_data = data[2]["G"]
-            card_data_found = True
-
-            if game_data.get("gameOver", False):
-                result["game_over"] = True
-
-            result["turn"] = game_data.get("currentTeam", game_data.get("turn", "unknown"))
-
-            result["red_remaining"] = game_data.get("score", {}).get("red", 0)
-            result["blue_remaining"] = game_data.get("score", {}).get("blue", 0)
-
-            anim_tokens = game_data.get("animTokens", [])
-
-            word_cards = {}
-            for token in anim_tokens:
-                if token.get("type") == "wordCard":
-                    location = token.get("location", {})
-                    if location.get("name") == "board":
-                        x = location.get("x", 0)
-                        y = location.get("y", 0)
-                        position = y * 5 + x
-                        word = token.get("data", {}).get("word", "")
-                        word_cards[position] = {
-                            "word": word,
-                            "revealed": token.get("data", {}).get("revealed", False),
-                            "color": "unknown"
-                        }
+    try:
+        result = board.card_data()
+    except Exception as e:
+        console.print(f"[bold red]Message processing error: {str(e)}[/bold red]")
+        return None
 
-            for token in anim_tokens:
-                if token.get("type") == "coverCard":
-                    token_id = token.get("id", "")
-                    parts = token_id.split("/")
-                    if len(parts) >= 3 and parts[0] == "coverCard":
-                        color = parts[1]
-                        position_str = parts[2]
-
-                        if position_str.isdigit():
-                            position = int(position_str)
-
-                            if position in word_cards:
-                                word_cards[position]["color"] = color
-
-            for position, card_info in word_cards.items():
-                word = card_info["word"]
-                color = card_info["color"]
-                revealed = card_info["revealed"]
-
-                if color == "red" and word not in result["red_cards"]:
-                    result["red_cards"].append(word)
-                elif color == "blue" and word not in result["blue_cards"]:
-                    result["blue_cards"].append(word)
-                elif color == "black" and not result["black_card"]:
-                    result["black_card"] = word
-                elif color == "gray" and word not in result["gray_cards"]:
-                    result["gray_cards"].append(word)
-
-                result["all_cards"][word] = {
-                    "position": position,
-                    "color": color,
-                    "revealed": revealed,
-                }
-
-        except Exception as e:
-            console.print(f"[bold red]Message processing error: {str(e)}[/bold red]")
-            continue
-
-    if not card_data_found:
+    if result is None:
         console.print("[bold yellow]No card data found in any message![/bold yellow]")
 
     return result
 
 
-def print_card_colors(card_data):
-    """Display card colors in a readable format"""
-    if not card_data:
-        console.print("[bold red]No card data to display![/bold red]")
-        return
+def render_card_colors(card_data):
+    """Build the renderable for the card color display"""
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
 
-    console.print(Panel("[bold]CODENAMES GAME STATUS[/bold]", style="blue"))
-
-    console.print(f"[bold]Turn:[/bold] {'RED' if card_data.get('turn') == 'red' else 'BLUE'} Team")
-    console.print(
+    status = Text.from_markup(
+        f"[bold]Turn:[/bold] {'RED' if card_data.get('turn') == 'red' else 'BLUE'} Team\n"
         f"[bold]Remaining Cards:[/bold] Red: {card_data.get('red_remaining', 0)}, Blue: "
         f"{card_data.get('blue_remaining', 0)}")
+    renderables = [Panel("[bold]CODENAMES GAME STATUS[/bold]", style="blue"), status]
 
     red_table = Table(title="RED CARDS", style="red")
     red_table.add_column("Word", style="red")
@@ -317,7 +355,7 @@ def print_card_colors(card_data):
     for word in card_data.get("red_cards", []):
         revealed = "✓" if card_data["all_cards"][word]["revealed"] else "✗"
         red_table.add_row(word, revealed)
-    console.print(red_table)
+    renderables.append(red_table)
 
     blue_table = Table(title="BLUE CARDS", style="blue")
     blue_table.add_column("Word", style="blue")
@@ -325,13 +363,13 @@ def print_card_colors(card_data):
     for word in card_data.get("blue_cards", []):
         revealed = "✓" if card_data["all_cards"][word]["revealed"] else "✗"
         blue_table.add_row(word, revealed)
-    console.print(blue_table)
+    renderables.append(blue_table)
 
     if card_data.get("black_card"):
         black_word = card_data.get("black_card")
         revealed = card_data["all_cards"][black_word]["revealed"]
-        console.print(Panel(f"[bold]ASSASSIN CARD:[/bold] {black_word} {'(Revealed)' if revealed else '(Hidden)'}",
-                            style="red on black"))
+        renderables.append(Panel(f"[bold]ASSASSIN CARD:[/bold] {black_word} {'(Revealed)' if revealed else '(Hidden)'}",
+                                 style="red on black"))
 
     neutral_table = Table(title="NEUTRAL CARDS", style="white")
     neutral_table.add_column("Word", style="white")
@@ -339,7 +377,18 @@ def print_card_colors(card_data):
     for word in card_data.get("gray_cards", []):
         revealed = "✓" if card_data["all_cards"][word]["revealed"] else "✗"
         neutral_table.add_row(word, revealed)
-    console.print(neutral_table)
+    renderables.append(neutral_table)
+
+    return Group(*renderables)
+
+
+def print_card_colors(card_data):
+    """Display card colors in a readable format"""
+    if not card_data:
+        console.print("[bold red]No card data to display![/bold red]")
+        return
+
+    console.print(render_card_colors(card_data))
 
 
 def generate_ai_prompt(card_data, team, language="tr"):
@@ -362,7 +411,7 @@ def generate_ai_prompt(card_data, team, language="tr"):
         console.print(f"[bold red]Unsupported language: {language}[/bold red]")
         return None
 
-    template = LANGUAGES[language]["prompt_template"].strip()
+    template = get_prompt_template(language).strip()
     prompt = template.format(
         current_team=current_team,
         other_team=other_team,
@@ -374,6 +423,41 @@ def generate_ai_prompt(card_data, team, language="tr"):
     return prompt
 
 
+def suggest_clues(engine, card_data, team, top):
+    """Clue suggestions of the local clue engine as cacheable rows, or None if no risk can be measured."""
+    from board_state import hidden_cards
+
+    cards = hidden_cards(card_data, team)
+    unknown = engine.unknown_words(cards.own + cards.neutral)
+    if unknown:
+        console.print(f"[bold yellow]⚠ No word vector for {', '.join(unknown)}; these cards are ignored by the "
+                      f"clue suggestions.[/bold yellow]")
+    try:
+        return [list(suggestion) for suggestion in engine.suggest(*cards, top=top)]
+    except ValueError as e:
+        console.print(f"[bold red]⚠ No clue suggestions: {str(e)}.[/bold red]")
+        return None
+
+
+def print_clue_suggestions(suggestions):
+    """Display ranked clue suggestions from the local clue engine"""
+    if not suggestions:
+        console.print("[bold yellow]No safe clue found for the current board.[/bold yellow]")
+        return
+
+    from rich.table import Table
+
+    table = Table(title="CLUE SUGGESTIONS", style="green")
+    table.add_column("Clue", style="bold")
+    table.add_column("Count", justify="right")
+    table.add_column("Targets")
+    table.add_column("Risk margin", justify="right")
+    for suggestion in suggestions:
+        table.add_row(suggestion.clue.upper(), str(suggestion.count), ", ".join(suggestion.targets),
+                      f"{suggestion.margin:.3f}")
+    console.print(table)
+
+
 def display_manual_instructions():
     """Display instructions for the manual method"""
     console.print("""
@@ -387,14 +471,255 @@ def display_manual_instructions():
     """)
 
 
-def main():
+COMMANDS = ("capture", "analyze", "prompt", "timeline", "analyze-archive")
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Codenames Game Analysis Tool')
-    parser.add_argument('--url', type=str, help='Codenames room URL')
-    parser.add_argument('--username', type=str, default='Spectator', help='Username')
-    parser.add_argument('--browser', action='store_true', help='Run browser in visible mode')
-    parser.add_argument('--wait', type=int, default=10, help='Maximum wait time (seconds)')
-    parser.add_argument('--manual', action='store_true', default=True, help='Use manual mode for AI prompt')
-    args = parser.parse_args()
+    subparsers = parser.add_subparsers(dest='command')
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--metrics', nargs='?', const=METRICS_FILE,
+                        help=f'Write frame counters and stage timings as JSON at exit (default file: {METRICS_FILE})')
+    common.add_argument('--profile', nargs='?', const=PROFILE_FILE,
+                        help=f'Run under cProfile and dump the statistics at exit (default file: {PROFILE_FILE})')
+
+    odds = argparse.ArgumentParser(add_help=False)
+    odds.add_argument('--odds', action='store_true',
+                      help='Estimate the win probability of both teams and the risk of clues with Monte Carlo playouts')
+    odds.add_argument('--playouts', type=int, default=200000, help='Number of playouts per estimate')
+    odds.add_argument('--accuracy', type=float, default=0.7,
+                      help='Probability that a guesser picks one of their own cards, random card otherwise')
+    odds.add_argument('--clue-size', type=int, default=2, help='Guesses per turn after the current one')
+    odds.add_argument('--odds-workers', type=int, help='Spread the playouts over this many processes')
+
+    capture_parser = subparsers.add_parser('capture', parents=[common, odds],
+                                           help='Capture a game from the browser and analyze it (default)')
+    capture_parser.add_argument('--url', type=str, help='Codenames room URL')
+    capture_parser.add_argument('--username', type=str, default='Spectator', help='Username')
+    capture_parser.add_argument('--browser', action='store_true', help='Run browser in visible mode')
+    capture_parser.add_argument('--profile-dir', type=str,
+                               help='Reuse a persistent browser profile directory between runs')
+    capture_parser.add_argument('--cdp', type=str,
+                               help='Attach to a running Chromium over CDP (e.g. http://localhost:9222) '
+                                    'instead of launching')
+    capture_parser.add_argument('--block-media', action='store_true',
+                               help='Do not load images, media and fonts of the game page')
+    capture_parser.add_argument('--wait', type=int, default=10, help='Maximum wait time (seconds)')
+    capture_parser.add_argument('--manual', action='store_true', default=True, help='Use manual mode for AI prompt')
+    capture_parser.add_argument('--background-writer', action='store_true',
+                               help='Write captured frames to disk from a background thread')
+    capture_parser.add_argument('--format', choices=CAPTURE_FORMATS, default='jsonl',
+                               help='Capture storage format: JSON lines or compressed delta blocks')
+    capture_parser.add_argument('--no-stop-on-board', dest='stop_on_board', action='store_false',
+                               help='Keep waiting after the first complete board has been received')
+    capture_parser.add_argument('--no-stop-on-game-over', dest='stop_on_game_over', action='store_false',
+                               help='Keep waiting after the game is over')
+    capture_parser.add_argument('--live', action='store_true',
+                               help='Keep following the game and update the board in place until Ctrl+C')
+    capture_parser.add_argument('--embeddings', type=str,
+                               help='Word vector store directory or word2vec/GloVe text file for local clue '
+                                    'suggestions (default: embeddings/<language> if it exists)')
+    capture_parser.add_argument('--embeddings-limit', type=int, default=200000,
+                               help='Number of words of the word vectors to use as clue candidates')
+    capture_parser.add_argument('--clues', type=int, default=10, help='Number of local clue suggestions to show')
+    capture_parser.add_argument('--no-cache', action='store_true',
+                               help='Do not reuse prompts and clue suggestions cached for the same board')
+    capture_parser.add_argument('--no-dedup', dest='dedup', action='store_false',
+                               help='Store every game state frame, including repeats of the previous state')
+    capture_parser.add_argument('--no-history', action='store_true',
+                               help=f'Do not add the captured games to the game history ({HISTORY_FILE})')
+    capture_parser.add_argument('--idle-timeout', type=float,
+                               help='Stop after this many seconds without a new game state (seconds)')
+
+    analyze_parser = subparsers.add_parser('analyze', parents=[common, odds],
+                                           help='Show the board of a recorded capture file')
+    analyze_parser.add_argument('file', help='Capture file (JSON lines or compact)')
+    analyze_parser.add_argument('--json', action='store_true', help='Print the card data as JSON')
+    analyze_parser.add_argument('--no-cache', action='store_true', help='Do not reuse the cached board of the file')
+    analyze_parser.add_argument('--team', choices=['red', 'blue'],
+                                help='Team giving the clue for --odds (default: the team on turn)')
+
+    prompt_parser = subparsers.add_parser('prompt', parents=[common],
+                                          help='Print the AI prompt for a recorded capture file')
+    prompt_parser.add_argument('file', help='Capture file (JSON lines or compact)')
+    prompt_parser.add_argument('--team', choices=['red', 'blue'], required=True, help='Your team')
+    prompt_parser.add_argument('--lang', choices=list(LANGUAGES), default='tr', help='Prompt language')
+    prompt_parser.add_argument('--copy', action='store_true', help='Also copy the prompt to the clipboard')
+    prompt_parser.add_argument('--no-cache', action='store_true', help='Do not reuse cached boards and prompts')
+
+    timeline_parser = subparsers.add_parser('timeline', parents=[common],
+                                            help='Show the turns and reveals of a recorded capture file')
+    timeline_parser.add_argument('file', help='Capture file (JSON lines or compact)')
+    timeline_parser.add_argument('--events', action='store_true', help='List the events instead of the turns')
+    timeline_parser.add_argument('--json', action='store_true', help='Print as JSON')
+    timeline_parser.add_argument('--rebuild', action='store_true',
+                                 help='Rebuild the stored timeline from the capture file')
+
+    archive_parser = subparsers.add_parser('analyze-archive', parents=[common],
+                                           help='Summarize the games of many capture files in parallel')
+    add_archive_arguments(archive_parser)
+    return parser
+
+
+def load_card_data(path, cache):
+    """Card data of the last board of a capture file, cached until the file changes."""
+    if not os.path.exists(path):
+        return evaluate_card_colors(path)
+    return cache.get_or_compute("board", capture_key(path), lambda: evaluate_card_colors(path))
+
+
+def copy_to_clipboard(text):
+    try:
+        import pyperclip
+        pyperclip.copy(text)
+        console.print("[bold green]✓ Prompt copied to clipboard![/bold green]")
+    except Exception as e:
+        console.print(f"[bold yellow]Could not copy to clipboard: {str(e)}[/bold yellow]")
+        console.print("[yellow]Please manually copy the prompt from the file.[/yellow]")
+
+
+def estimate_odds(card_data, team, args):
+    """Win probabilities and the risk of clues for 1 to 4 cards from Monte Carlo playouts, or None if not possible."""
+    from win_estimator import clue_risk, estimate_win_probability, hidden_counts
+
+    options = {"playouts": args.playouts, "accuracy": args.accuracy, "clue_size": args.clue_size,
+               "workers": args.odds_workers}
+    try:
+        estimate = estimate_win_probability(card_data, **options)
+        team = team or card_data.get("turn")
+        own = hidden_counts(card_data)[0 if team == "red" else 1]
+        risks = []
+        if not card_data.get("game_over") and estimate.playouts:
+            risks = [clue_risk(card_data, count, team=team, **options) for count in range(1, min(4, own) + 1)]
+    except ValueError as e:
+        console.print(f"[bold yellow]No estimate possible: {str(e)}[/bold yellow]")
+        return None
+    return estimate, team, risks
+
+
+def print_odds(estimate, team, risks):
+    """Display the win probabilities and clue risks of `estimate_odds`"""
+    from rich.table import Table
+
+    console.print(f"[bold]Win probability:[/bold] [red]RED {estimate.red:.1%}[/red], "
+                  f"[blue]BLUE {estimate.blue:.1%}[/blue] ({estimate.playouts} playouts, "
+                  f"{estimate.seconds:.2f} seconds)")
+    if not risks:
+        return
+
+    table = Table(title=f"CLUE RISK FOR {team.upper()}")
+    for column in ("Count", "All correct", "Expected correct", "Opponent", "Neutral", "Assassin", "Win"):
+        table.add_column(column, justify="right")
+    for risk in risks:
+        table.add_row(str(risk.count), f"{risk.all_correct:.1%}", f"{risk.expected_correct:.2f}",
+                      f"{risk.opponent:.1%}", f"{risk.neutral:.1%}", f"{risk.assassin:.1%}", f"{risk.win:.1%}")
+    console.print(table)
+
+
+def run_analyze(args, metrics=NULL_METRICS):
+    """Show the board of a recorded capture without starting a browser."""
+    cache = ResultCache(None if args.no_cache else CACHE_FILE)
+    with metrics.timer("evaluate"):
+        card_data = load_card_data(args.file, cache)
+    cache.close()
+    if not card_data:
+        return 1
+
+    odds = None
+    if args.odds:
+        with metrics.timer("odds"):
+            odds = estimate_odds(card_data, args.team, args)
+
+    with metrics.timer("render"):
+        if args.json:
+            if odds:
+                estimate, team, risks = odds
+                card_data = dict(card_data, odds={"win": estimate._asdict(), "team": team,
+                                                  "clues": [risk._asdict() for risk in risks]})
+            print(json.dumps(card_data, ensure_ascii=False, indent=2))
+        else:
+            print_card_colors(card_data)
+            if odds:
+                print_odds(*odds)
+    return 0
+
+
+def prompt_key(card_data, team, language):
+    """Cache key of the prompt of a board, which changes when the prompt template is edited."""
+    template_digest = hashlib.blake2b(get_prompt_template(language).encode("utf-8"), digest_size=16).hexdigest()
+    return board_key(card_data, team, language, template_digest)
+
+
+def run_prompt(args, metrics=NULL_METRICS):
+    """Print the AI prompt of a recorded capture without starting a browser."""
+    cache = ResultCache(None if args.no_cache else CACHE_FILE)
+    with metrics.timer("evaluate"):
+        card_data = load_card_data(args.file, cache)
+    ai_prompt = None
+    if card_data:
+        with metrics.timer("prompt"):
+            ai_prompt = cache.get_or_compute("prompt", prompt_key(card_data, args.team, args.lang),
+                                             lambda: generate_ai_prompt(card_data, args.team, args.lang))
+    cache.close()
+    if not ai_prompt:
+        return 1
+
+    print(ai_prompt)
+    if args.copy:
+        copy_to_clipboard(ai_prompt)
+    return 0
+
+
+def print_turns(game_turns):
+    """Display the per-turn timing of a timeline"""
+    from rich.table import Table
+
+    table = Table(title="TURNS")
+    table.add_column("Match")
+    table.add_column("Turn", justify="right")
+    table.add_column("Team")
+    table.add_column("Duration", justify="right")
+    table.add_column("Revealed")
+    for turn in game_turns:
+        duration = f"{turn.duration:.1f} s" if turn.duration is not None else "-"
+        table.add_row(str(turn.match_id), str(turn.number), str(turn.team).upper(),
+                      duration, ", ".join(turn.reveals))
+    console.print(table)
+
+
+def run_timeline(args, metrics=NULL_METRICS):
+    """Show the turns or events of a recorded capture, from its stored timeline."""
+    if not os.path.exists(args.file):
+        console.print(f"[bold red]Error: File {args.file} not found.[/bold red]")
+        return 1
+
+    with metrics.timer("evaluate"):
+        events = load_timeline(args.file, rebuild=args.rebuild)
+    metrics.count("timeline_events", len(events))
+
+    with metrics.timer("render"):
+        if args.events:
+            rows = [event._asdict() for event in events]
+        else:
+            game_turns = turns(events)
+            rows = [turn._asdict() for turn in game_turns]
+
+        if args.json:
+            print(json.dumps(rows, ensure_ascii=False, indent=2))
+        elif args.events:
+            for event in events:
+                details = f" {event.word} ({event.color})" if event.kind == "reveal" else ""
+                console.print(f"{event.timestamp:.3f} {event.match_id} {event.kind} {event.team}{details}")
+        else:
+            print_turns(game_turns)
+    return 0
+
+
+def run_capture(args, metrics=NULL_METRICS):
+    """Interactive capture from the browser, followed by the analysis of the captured board."""
+    from rich.live import Live
+    from rich.panel import Panel
 
     target_url = args.url
     if not target_url:
@@ -418,22 +743,98 @@ def main():
         console.print(f"[bold red]Unsupported language: {language_choice}[/bold red]")
         return
 
-    codenames_messages, game_data, _ = capture_websocket_data(
-        target_url,
-        username=args.username,
-        browser_visible=args.browser,
-        max_wait_time=args.wait
-    )
+    cache = ResultCache(None if args.no_cache else CACHE_FILE)
 
-    if not codenames_messages:
-        console.print("[bold red]⚠ Analysis not possible: No WebSocket messages received.[/bold red]")
-        return
+    def cached_prompt(card_data):
+        return cache.get_or_compute("prompt", prompt_key(card_data, team, language_choice),
+                                    lambda: generate_ai_prompt(card_data, team, language_choice))
 
-    card_data = evaluate_card_colors("codenames_data/codenames_messages.json")
-    if card_data:
-        print_card_colors(card_data)
+    shown_card_data = None
+    live_display = None
+
+    def show_board(card_data):
+        nonlocal shown_card_data, live_display
+        shown_card_data = card_data
+
+        with metrics.timer("prompt"):
+            ai_prompt = cached_prompt(card_data)
+        if ai_prompt:
+            with open("codenames_data/ai_prompt.txt", "w", encoding="utf-8") as f:
+                f.write(ai_prompt)
+
+        with metrics.timer("render"):
+            if args.live:
+                if live_display is None:
+                    live_display = Live(console=console.get(), auto_refresh=False)
+                    live_display.start()
+                live_display.update(render_card_colors(card_data), refresh=True)
+            else:
+                print_card_colors(card_data)
+        if not args.live and ai_prompt:
+            console.print("[green]Prompt updated in codenames_data/ai_prompt.txt[/green]")
 
-        ai_prompt = generate_ai_prompt(card_data, team, language_choice)
+    try:
+        codenames_messages, board, _ = capture_websocket_data(
+            target_url,
+            username=args.username,
+            browser=BrowserOptions(args.browser, args.profile_dir, args.cdp, args.block_media),
+            waiting=WaitOptions(args.wait, args.stop_on_board, args.stop_on_game_over, args.idle_timeout, args.live),
+            storage=StorageOptions(args.format, background_writer=args.background_writer, dedup=args.dedup,
+                                   history_file=None if args.no_history else HISTORY_FILE),
+            on_board=show_board,
+            metrics=metrics
+        )
+
+        if not codenames_messages:
+            console.print("[bold red]⚠ Analysis not possible: No WebSocket messages received.[/bold red]")
+            return
+
+        if not board.ready:
+            # The capture file also holds earlier captures, whose boards must not be shown as this one
+            console.print("[bold red]⚠ Analysis not possible: No board was received.[/bold red]")
+            return
+        card_data = board.card_data()
+    except KeyboardInterrupt:
+        if not args.live:
+            raise
+        console.print("[bold yellow]Live mode stopped.[/bold yellow]")
+        card_data = shown_card_data
+    finally:
+        if live_display is not None:
+            live_display.stop()
+
+    if card_data:
+        if card_data != shown_card_data:
+            print_card_colors(card_data)
+
+        from embedding_store import EmbeddingStore, language_directory, source_version
+
+        embeddings = args.embeddings or language_directory(language_choice)
+        if os.path.exists(embeddings):
+            from clue_engine import ClueEngine, ClueSuggestion
+
+            clues_key = board_key(card_data, team, language_choice, source_version(embeddings),
+                                  args.embeddings_limit, args.clues, include_neutral=True)
+            rows = cache.get("clues", clues_key)
+            if rows is None:
+                if os.path.isdir(embeddings):
+                    engine = ClueEngine(EmbeddingStore(embeddings), max_clues=args.embeddings_limit)
+                else:
+                    engine = ClueEngine.from_text_file(embeddings, limit=args.embeddings_limit,
+                                                       language=language_choice)
+                rows = suggest_clues(engine, card_data, team, args.clues)
+                if rows is not None:
+                    cache.put("clues", clues_key, rows)
+            if rows is not None:
+                print_clue_suggestions([ClueSuggestion(*row) for row in rows])
+
+        if args.odds:
+            with metrics.timer("odds"):
+                odds = estimate_odds(card_data, team, args)
+            if odds:
+                print_odds(*odds)
+
+        ai_prompt = cached_prompt(card_data)
 
         if ai_prompt:
 
@@ -442,19 +843,50 @@ def main():
 
             console.print(f"[bold green]Prompt generated and saved to codenames_data/ai_prompt.txt[/bold green]")
 
-            try:
-                pyperclip.copy(ai_prompt)
-                console.print("[bold green]✓ Prompt copied to clipboard![/bold green]")
-            except Exception as e:
-                console.print(f"[bold yellow]Could not copy to clipboard: {str(e)}[/bold yellow]")
-                console.print("[yellow]Please manually copy the prompt from the file.[/yellow]")
+            copy_to_clipboard(ai_prompt)
 
             display_manual_instructions()
     else:
         console.print("[bold red]⚠ Analysis not possible: Could not retrieve card data.[/bold red]")
 
+    if cache.hits or cache.misses:
+        console.print(f"[green]Result cache: {cache.hits} hits ({cache.stats['memory_hits']} memory, "
+                      f"{cache.stats['disk_hits']} disk), {cache.misses} misses[/green]")
+    cache.close()
+
     console.print("[bold green]Analysis completed. Exiting...[/bold green]")
 
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Without a command the tool captures, as it did before the subcommands existed
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["capture"] + argv
+    args = build_parser().parse_args(argv)
+
+    commands = {"capture": run_capture, "analyze": run_analyze, "prompt": run_prompt, "timeline": run_timeline,
+                "analyze-archive": lambda args, metrics: run_archive(args)}
+    run = commands[args.command]
+    metrics = Metrics() if args.metrics else NULL_METRICS
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    try:
+        if profiler is not None:
+            return profiler.runcall(run, args, metrics)
+        return run(args, metrics)
+    finally:
+        if profiler is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(args.profile)), exist_ok=True)
+            profiler.dump_stats(args.profile)
+            print(f"Profile written to {args.profile}", file=sys.stderr)
+        if metrics.enabled:
+            metrics.write(args.metrics)
+            print(f"Metrics written to {args.metrics}", file=sys.stderr)
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
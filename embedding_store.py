@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from languages import lowercase
+
+EMBEDDINGS_ROOT = "embeddings"
+DTYPES = ("float32", "float16")
+
+
+def language_directory(language, root=EMBEDDINGS_ROOT):
+    return os.path.join(root, language)
+
+
+def source_version(path):
+    """Path, size and modification time identifying a store (by its `meta.json`) or a text vector file.
+
+    `meta.json` is written last by every conversion, so the version changes
+    whenever a store is rebuilt.
+    """
+    stamp_path = os.path.join(path, "meta.json") if os.path.isdir(path) else path
+    stat = os.stat(stamp_path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def available_languages(root=EMBEDDINGS_ROOT):
+    """List the languages with a converted store, without opening any of them."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if os.path.exists(os.path.join(root, name, "meta.json")))
+
+
+def _scan_text_file(path, limit=None, language=None):
+    """First pass over a text vector file: count rows, dimensions and the longest word."""
+    rows = 0
+    dimensions = None
+    max_word_bytes = 1
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line_number, line in enumerate(f):
+            parts = line.rstrip().split(" ")
+            if line_number == 0 and len(parts) == 2:
+                continue
+            if dimensions is None:
+                dimensions = len(parts) - 1
+            elif len(parts) - 1 != dimensions:
+                continue
+            max_word_bytes = max(max_word_bytes, len(lowercase(parts[0], language).encode("utf-8")))
+            rows += 1
+            if limit and rows >= limit:
+                break
+    return rows, dimensions, max_word_bytes
+
+
+def convert(text_path, directory, dtype="float32", limit=None, language=None):
+    """Convert a word2vec/GloVe text file into a memory-mappable store.
+
+    The store holds the normalized vectors as a `.npy` matrix, the words in row
+    order and a sorted copy of the words with their rows for binary search,
+    all as fixed-width arrays so that nothing has to be parsed at load time.
+    Words are lowercased by the rules of `language`, which is recorded in
+    `meta.json`; later duplicates are dropped from the sorted index.
+    Returns the number of rows written.
+    """
+    rows, dimensions, max_word_bytes = _scan_text_file(text_path, limit, language)
+    if not rows:
+        raise ValueError(f"No vectors found in {text_path}")
+
+    os.makedirs(directory, exist_ok=True)
+    vectors = np.lib.format.open_memmap(os.path.join(directory, "vectors.npy"), mode="w+",
+                                        dtype=dtype, shape=(rows, dimensions))
+    words = np.zeros(rows, dtype=f"S{max_word_bytes}")
+
+    row = 0
+    with open(text_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line_number, line in enumerate(f):
+            parts = line.rstrip().split(" ")
+            if line_number == 0 and len(parts) == 2:
+                continue
+            if len(parts) - 1 != dimensions:
+                continue
+            vector = np.array(parts[1:], dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vectors[row] = vector / norm if norm else vector
+            words[row] = lowercase(parts[0], language).encode("utf-8")
+            row += 1
+            if row >= rows:
+                break
+    vectors.flush()
+    del vectors
+
+    order = np.argsort(words, kind="stable")
+    sorted_words = words[order]
+    keep = np.ones(rows, dtype=bool)
+    keep[1:] = sorted_words[1:] != sorted_words[:-1]
+
+    clue_mask = np.array([word.decode("utf-8", errors="ignore").isalpha() for word in words], dtype=bool)
+
+    np.save(os.path.join(directory, "words.npy"), words)
+    np.save(os.path.join(directory, "sorted_words.npy"), sorted_words[keep])
+    np.save(os.path.join(directory, "sorted_rows.npy"), order[keep].astype(np.int32))
+    np.save(os.path.join(directory, "clue_mask.npy"), clue_mask)
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"rows": rows, "dimensions": dimensions, "dtype": dtype, "source": os.path.basename(text_path),
+                   "language": language}, f)
+    return rows
+
+
+class EmbeddingStore:
+    """Memory-mapped word vectors of one language, opened on first use.
+
+    Creating a store only records its directory; the arrays are mapped with
+    `numpy.memmap` when first accessed, so installed languages cost nothing
+    until they are used. Implements the lookup interface of
+    `clue_engine.WordVectors`.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._arrays = {}
+        self._meta = None
+
+    @classmethod
+    def for_language(cls, language, root=EMBEDDINGS_ROOT):
+        return cls(language_directory(language, root))
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, "meta.json"))
+
+    def _array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+        return self._arrays[name]
+
+    @property
+    def vectors(self):
+        return self._array("vectors")
+
+    @property
+    def clue_mask(self):
+        return self._array("clue_mask")
+
+    @property
+    def language(self):
+        """Language whose lowercasing rules the store was converted with, from its `meta.json`."""
+        if self._meta is None:
+            with open(os.path.join(self.directory, "meta.json"), encoding="utf-8") as f:
+                self._meta = json.load(f)
+        return self._meta.get("language")
+
+    def __len__(self):
+        return len(self._array("words"))
+
+    def lookup(self, word):
+        """Return the row of a word by binary search, or None if it is not in the store."""
+        key = lowercase(word, self.language).encode("utf-8")
+        sorted_words = self._array("sorted_words")
+        if len(key) > sorted_words.dtype.itemsize:
+            return None
+        position = int(np.searchsorted(sorted_words, key))
+        if position < len(sorted_words) and sorted_words[position] == key:
+            return int(self._array("sorted_rows")[position])
+        return None
+
+    def word(self, row):
+        return self._array("words")[row].decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-language word vector stores for local clue suggestions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Convert a word2vec/GloVe text file')
+    convert_parser.add_argument('vectors', help='Text vector file')
+    convert_parser.add_argument('--lang', required=True, help="Language code, e.g. 'en'")
+    convert_parser.add_argument('--dtype', choices=DTYPES, default='float32', help='Stored precision')
+    convert_parser.add_argument('--limit', type=int, help='Number of words to keep')
+    convert_parser.add_argument('--root', default=EMBEDDINGS_ROOT, help='Directory of the stores')
+
+    list_parser = subparsers.add_parser('list', help='List installed languages')
+    list_parser.add_argument('--root', default=EMBEDDINGS_ROOT, help='Directory of the stores')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        directory = language_directory(args.lang, args.root)
+        rows = convert(args.vectors, directory, dtype=args.dtype, limit=args.limit, language=args.lang)
+        print(f"Converted {rows} words into {directory}")
+    else:
+        for language in available_languages(args.root):
+            with open(os.path.join(language_directory(language, args.root), "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            print(f"{language}: {meta['rows']} words, {meta['dimensions']} dimensions, {meta['dtype']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+from functools import lru_cache
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import ujson
+
+        json_loads = ujson.loads
+        JSON_BACKEND = "ujson"
+    except ImportError:
+        json_loads = json.loads
+        JSON_BACKEND = "json"
+
+FRAME_PREFIX = "42/codenames,"
+DECODE_CACHE_SIZE = 256
+
+
+def extract_payload(frame):
+    """Return the socket.io payload following the `42/codenames,` prefix, or None."""
+    if not isinstance(frame, str):
+        return None
+
+    if frame.startswith(FRAME_PREFIX):
+        return frame[len(FRAME_PREFIX):]
+
+    index = frame.find(FRAME_PREFIX)
+    if index == -1:
+        return None
+    return frame[index + len(FRAME_PREFIX):]
+
+
+def is_game_state_payload(payload):
+    """Cheap check that a payload can hold a `G` snapshot, done before any decoding."""
+    return '"G"' in payload and '"matchID"' in payload
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _decode_payload(payload):
+    try:
+        data = json_loads(payload)
+    except ValueError:
+        return None
+
+    if not isinstance(data, list) or len(data) < 3 or not isinstance(data[2], dict):
+        return None
+
+    game_data = data[2].get("G")
+    if not isinstance(game_data, dict) or game_data.get("matchID") is None:
+        return None
+    return game_data
+
+
+def decode_payload(payload):
+    """Decode the `G` snapshot of a payload returned by `extract_payload`, or return None."""
+    return _decode_payload(payload)
+
+
+def decode_game_state(frame):
+    """Decode the `G` snapshot of a raw `42/codenames` frame.
+
+    Returns None for frames without a game state. Decoded frames are cached, so
+    the same frame is never parsed twice; the returned dictionary is shared and
+    must not be modified.
+    """
+    payload = extract_payload(frame)
+    if payload is None or not is_game_state_payload(payload):
+        return None
+    return _decode_payload(payload)
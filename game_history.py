@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from board_state import BOARD_SIZE, COLOR_CODES, BoardState
+from capture_reader import iter_frames
+from timeline import TimelineBuilder
+
+HISTORY_FILE = "codenames_data/game_history.sqlite"
+BATCH_SIZE = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    match_id TEXT PRIMARY KEY, starting_team TEXT, winner TEXT, finished INTEGER NOT NULL DEFAULT 0,
+    turns INTEGER NOT NULL DEFAULT 1, reveals INTEGER NOT NULL DEFAULT 0, started REAL, ended REAL,
+    snapshots INTEGER NOT NULL DEFAULT 0, last_team TEXT);
+CREATE TABLE IF NOT EXISTS snapshots (
+    match_id TEXT NOT NULL, number INTEGER NOT NULL, timestamp REAL, turn_number INTEGER, team TEXT,
+    red_remaining INTEGER, blue_remaining INTEGER, revealed INTEGER, game_over INTEGER,
+    PRIMARY KEY (match_id, number)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cards (
+    match_id TEXT NOT NULL, position INTEGER NOT NULL, word TEXT NOT NULL, color TEXT NOT NULL,
+    PRIMARY KEY (match_id, position)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reveals (
+    match_id TEXT NOT NULL, timestamp REAL, turn_number INTEGER NOT NULL, team TEXT, position INTEGER, word TEXT,
+    color TEXT);
+CREATE INDEX IF NOT EXISTS games_started ON games (started);
+CREATE INDEX IF NOT EXISTS snapshots_timestamp ON snapshots (timestamp);
+CREATE INDEX IF NOT EXISTS cards_word ON cards (word);
+CREATE INDEX IF NOT EXISTS reveals_match ON reveals (match_id);
+CREATE INDEX IF NOT EXISTS reveals_color_turn ON reveals (color, turn_number);
+"""
+
+GAME_COLUMNS = ("match_id", "starting_team", "winner", "finished", "turns", "reveals", "started", "ended",
+                "snapshots", "last_team")
+ALL_POSITIONS = (1 << BOARD_SIZE) - 1
+
+
+class GameHistory:
+    """Append-only SQLite store of every captured game, keyed by `matchID`.
+
+    Snapshots are added one at a time together with their timeline events
+    (see `timeline.TimelineBuilder`) and inserted in batches of `batch_size`
+    snapshots, each batch in one transaction. Besides one row per snapshot,
+    the store keeps the cards of every game, every reveal with its turn
+    number and a summary row per game, so history queries never touch raw
+    frames. Snapshots that are not newer than the last stored snapshot of
+    their game are skipped, so importing the same capture twice, or a capture
+    that continues a stored game, does not duplicate anything.
+    """
+
+    def __init__(self, path=HISTORY_FILE, batch_size=BATCH_SIZE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.added = 0
+        self.skipped = 0
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(SCHEMA)
+        self._games = {}
+        self._changed_games = set()
+        self._pending = {"snapshots": [], "cards": [], "reveals": []}
+        self._pending_snapshots = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _game(self, match_id, timestamp, team, state):
+        """Summary of a game, loaded from the store the first time the game is seen."""
+        game = self._games.get(match_id)
+        if game is not None:
+            return game
+
+        row = self._db.execute(f"SELECT {', '.join(GAME_COLUMNS)} FROM games WHERE match_id = ?",
+                               (match_id,)).fetchone()
+        if row is None:
+            starting_team = state.board().starting_team or team
+            game = dict(zip(GAME_COLUMNS, (match_id, starting_team, None, 0, 1, 0, timestamp, timestamp, 0, team)))
+            game["new"] = True
+            game["last_timestamp"] = None
+            game["stored_cards"] = game["unknown_cards"] = 0
+        else:
+            game = dict(zip(GAME_COLUMNS, row))
+            game["new"] = False
+            game["last_timestamp"] = self._db.execute("SELECT MAX(timestamp) FROM snapshots WHERE match_id = ?",
+                                                      (match_id,)).fetchone()[0]
+            game["stored_cards"] = game["unknown_cards"] = 0
+            for position, color in self._db.execute("SELECT position, color FROM cards WHERE match_id = ?",
+                                                    (match_id,)):
+                game["stored_cards"] |= 1 << position
+                if color == "unknown":
+                    game["unknown_cards"] |= 1 << position
+        self._games[match_id] = game
+        return game
+
+    def add(self, state, timestamp, events=()):
+        """Add the latest snapshot of a `BoardState` and the timeline events it caused.
+
+        Returns False if the snapshot was skipped because there is no board or
+        its game already holds a snapshot at or after `timestamp`.
+        """
+        if not state.ready:
+            return False
+        match_id, revealed, red_remaining, blue_remaining, team, game_over, _ = state.fingerprint
+        game = self._game(match_id, timestamp, team, state)
+        if timestamp is not None and game["last_timestamp"] is not None and timestamp <= game["last_timestamp"]:
+            self.skipped += 1
+            return False
+
+        for event in events:
+            if event.kind == "game":
+                # A capture continuing a stored game may start on the other team's turn
+                if game["snapshots"] and event.team != game["last_team"]:
+                    game["turns"] += 1
+            elif event.kind == "turn":
+                game["turns"] += 1
+            elif event.kind == "reveal":
+                game["reveals"] += 1
+                self._pending["reveals"].append((match_id, event.timestamp, game["turns"], event.team,
+                                                 event.position, event.word, event.color))
+            elif event.kind == "game_over":
+                game["finished"] = 1
+                game["winner"] = event.team
+
+        if game["stored_cards"] != ALL_POSITIONS or game["unknown_cards"]:
+            self._add_cards(game, state.board())
+
+        game["snapshots"] += 1
+        game["last_team"] = team
+        game["ended"] = timestamp
+        if timestamp is not None:
+            game["last_timestamp"] = timestamp
+        self._pending["snapshots"].append((match_id, game["snapshots"], timestamp, game["turns"], team,
+                                           red_remaining, blue_remaining, revealed, int(game_over)))
+        self._changed_games.add(match_id)
+        self.added += 1
+
+        self._pending_snapshots += 1
+        if self._pending_snapshots >= self.batch_size:
+            self.flush()
+        return True
+
+    def _add_cards(self, game, board):
+        """Store the cards not stored yet, and the colors of stored cards that were unknown so far."""
+        unknown = board.color_masks[COLOR_CODES["unknown"]]
+        on_board = 0
+        for mask in board.color_masks:
+            on_board |= mask
+        changed = (on_board & ~game["stored_cards"]) | (game["unknown_cards"] & on_board & ~unknown)
+        game["stored_cards"] |= on_board
+        game["unknown_cards"] = (game["unknown_cards"] | unknown) & ~(on_board & ~unknown)
+        while changed:
+            low_bit = changed & -changed
+            changed ^= low_bit
+            position = low_bit.bit_length() - 1
+            self._pending["cards"].append((game["match_id"], position, board.words[position],
+                                           board.color_at(position)))
+
+    def flush(self):
+        """Insert the pending rows and update the changed games in one transaction."""
+        if not self._pending_snapshots and not self._changed_games:
+            return
+
+        games = [self._games[match_id] for match_id in self._changed_games]
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO games (match_id) VALUES (?)",
+                                 [(game["match_id"],) for game in games if game["new"]])
+            self._db.executemany(f"UPDATE games SET {', '.join(f'{column} = ?' for column in GAME_COLUMNS[1:])} "
+                                 "WHERE match_id = ?",
+                                 [tuple(game[column] for column in GAME_COLUMNS[1:]) + (game["match_id"],)
+                                  for game in games])
+            self._db.executemany("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 self._pending["snapshots"])
+            self._db.executemany("INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?)", self._pending["cards"])
+            self._db.executemany("INSERT INTO reveals VALUES (?, ?, ?, ?, ?, ?, ?)", self._pending["reveals"])
+
+        for game in games:
+            game["new"] = False
+        self._changed_games.clear()
+        self._pending = {"snapshots": [], "cards": [], "reveals": []}
+        self._pending_snapshots = 0
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def import_capture(self, path):
+        """Add every snapshot of a capture file; returns the number of snapshots added."""
+        added = self.added
+        state = BoardState()
+        timeline = TimelineBuilder()
+        for frame in iter_frames(path):
+            if state.apply(frame["G"]):
+                events = timeline.observe(state, frame.get("timestamp"))
+                self.add(state, frame.get("timestamp"), events)
+        self.flush()
+        return self.added - added
+
+    def query(self, sql, parameters=()):
+        """Run a read query and return the rows as dictionaries."""
+        cursor = self._db.execute(sql, parameters)
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def assassin_games(self, max_turn=None):
+        """Games in which the assassin was revealed, optionally only up to turn `max_turn`."""
+        sql = ("SELECT games.*, reveals.turn_number AS assassin_turn, reveals.team AS assassin_team "
+               "FROM reveals JOIN games USING (match_id) WHERE reveals.color = 'black'")
+        parameters = ()
+        if max_turn is not None:
+            sql += " AND reveals.turn_number <= ?"
+            parameters = (max_turn,)
+        return self.query(sql + " ORDER BY games.started", parameters)
+
+    def frequent_words(self, limit=20, color=None):
+        """The most frequent board words, optionally of one card color."""
+        if color:
+            return self.query("SELECT word, COUNT(*) AS games FROM cards WHERE color = ? GROUP BY word "
+                              "ORDER BY games DESC, word LIMIT ?", (color, limit))
+        return self.query("SELECT word, COUNT(*) AS games FROM cards GROUP BY word ORDER BY games DESC, word LIMIT ?",
+                          (limit,))
+
+
+def main():
+    from archive_analyzer import find_captures
+
+    parser = argparse.ArgumentParser(description='Indexed history of captured Codenames games')
+    parser.add_argument('--db', default=HISTORY_FILE, help='History database file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Add capture files or directories to the history')
+    import_parser.add_argument('paths', nargs='+', help='Capture files or directories containing them')
+
+    assassin_parser = subparsers.add_parser('assassin', help='Games in which the assassin was revealed')
+    assassin_parser.add_argument('--max-turn', type=int, help='Only games where it happened up to this turn')
+
+    words_parser = subparsers.add_parser('words', help='Most frequent board words')
+    words_parser.add_argument('--limit', type=int, default=20, help='Number of words')
+    words_parser.add_argument('--color', choices=['red', 'blue', 'gray', 'black'], help='Only cards of this color')
+
+    sql_parser = subparsers.add_parser('sql', help='Run a read query')
+    sql_parser.add_argument('query', help='SQL query')
+    args = parser.parse_args()
+
+    with GameHistory(args.db) as history:
+        if args.command == 'import':
+            started_at = time.perf_counter()
+            captures = find_captures(args.paths)
+            added = sum(history.import_capture(path) for path in captures)
+            print(f"Added {added} snapshots from {len(captures)} files ({history.skipped} already stored) "
+                  f"in {time.perf_counter() - started_at:.2f} seconds")
+            return
+
+        started_at = time.perf_counter()
+        if args.command == 'assassin':
+            rows = history.assassin_games(args.max_turn)
+        elif args.command == 'words':
+            rows = history.frequent_words(args.limit, args.color)
+        else:
+            rows = history.query(args.query)
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        print(f"{len(rows)} rows in {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
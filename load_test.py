@@ -0,0 +1,362 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import struct
+import tempfile
+import time
+from collections import namedtuple
+
+from capture_format import CAPTURE_FORMATS
+from simulator import synthetic_game_states
+
+HOST = "127.0.0.1"
+PORT = 8765
+FRAMES = 5000
+RATE = 500
+WEBSOCKET_PATH = "/socket.io/"
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+# engine.io open packet and socket.io namespace connect, sent before the game frames like the real server does
+OPENING_PACKETS = ('0{"sid":"load-test","upgrades":[],"pingInterval":25000,"pingTimeout":20000,"maxPayload":1000000}',
+                   '40/codenames,{"sid":"load-test"}')
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Codenames load test</title></head>
+<body>
+<form id="join">
+  <input id="nickname-input" type="text">
+  <button role="button" type="submit">Join</button>
+</form>
+<script>
+document.getElementById("join").addEventListener("submit", function (event) {
+  event.preventDefault();
+  var scene = document.createElement("div");
+  scene.id = "gamescene";
+  document.body.appendChild(scene);
+  var protocol = location.protocol === "https:" ? "wss://" : "ws://";
+  window.socket = new WebSocket(protocol + location.host + "/socket.io/?EIO=4&transport=websocket");
+});
+</script>
+</body>
+</html>
+"""
+
+StreamStats = namedtuple("StreamStats", ["frames", "bytes", "seconds"])
+LoadTestResult = namedtuple("LoadTestResult", ["sent", "sent_bytes", "send_seconds", "received", "duplicates",
+                                               "written", "latencies", "queue_delay", "wall_seconds",
+                                               "cpu_seconds", "browser_cpu_seconds", "metrics"])
+
+
+def websocket_frame(payload, opcode=0x1):
+    """Encode an unmasked server-to-client WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def encode_frame_parts(game_data, payload_size=0):
+    """Split the `42/codenames` frame of a `G` snapshot around the place of its send time.
+
+    The server stamps every frame with `G.sentAt` (seconds since the epoch)
+    just before sending it, so the latency of each frame can be read back
+    from the capture. Smaller snapshots are padded with a `padding` field to
+    about `payload_size` bytes.
+    """
+    prefix = ("42/codenames," + json.dumps(["update", game_data["matchID"]])[:-1] + ',{"G":{"sentAt":').encode()
+    body = json.dumps(game_data)
+    padding = payload_size - len(prefix) - len(body) - 32
+    if padding > 0:
+        body = json.dumps(dict(game_data, padding="x" * padding))
+    return prefix, ("," + body[1:] + "}]").encode()
+
+
+class StandInServer:
+    """Local stand-in for the game site, for capture tests without network access.
+
+    Serves a page with the `#nickname-input`, submit button and
+    `div#gamescene` elements the capture waits for. Once the page has joined,
+    it opens a WebSocket on which the server sends the socket.io opening
+    packets and then `frames` synthetic game state frames (see
+    `simulator.synthetic_game_states`) at `rate` frames per second, each
+    stamped with its send time. Frames that fall behind schedule are sent in
+    a burst. `on_stream` is called with the `StreamStats` of every finished
+    WebSocket.
+    """
+
+    def __init__(self, frames=FRAMES, rate=RATE, payload_size=0, ticks=1, seed=0, host=HOST, port=PORT,
+                 on_stream=None):
+        self.rate = rate
+        self.host = host
+        self.port = port
+        self.on_stream = on_stream
+        self.frames = [encode_frame_parts(game_data, payload_size)
+                       for game_data in synthetic_game_states(frames, seed=seed, ticks=ticks)]
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            lines = request.decode("latin-1").split("\r\n")
+            path = lines[0].split(" ")[1] if len(lines[0].split(" ")) > 1 else "/"
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if path.startswith(WEBSOCKET_PATH) and headers.get("upgrade", "").lower() == "websocket":
+                accept = base64.b64encode(hashlib.sha1(headers["sec-websocket-key"].encode() + WEBSOCKET_GUID)
+                                          .digest()).decode()
+                writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                              f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+                await self._stream(reader, writer)
+            elif path.split("?")[0] == "/":
+                body = PAGE.encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                             b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, reader, writer):
+        closed = asyncio.Event()
+        watcher = asyncio.create_task(self._read_until_close(reader, writer, closed))
+        for packet in OPENING_PACKETS:
+            writer.write(websocket_frame(packet.encode()))
+
+        sent = 0
+        sent_bytes = 0
+        started_at = time.perf_counter()
+        try:
+            while sent < len(self.frames) and not closed.is_set():
+                due = min(len(self.frames), int((time.perf_counter() - started_at) * self.rate) + 1)
+                while sent < due:
+                    prefix, suffix = self.frames[sent]
+                    frame = websocket_frame(prefix + repr(time.time()).encode() + suffix)
+                    writer.write(frame)
+                    sent += 1
+                    sent_bytes += len(frame)
+                await writer.drain()
+                delay = started_at + sent / self.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            seconds = time.perf_counter() - started_at
+            if self.on_stream:
+                self.on_stream(StreamStats(sent, sent_bytes, seconds))
+            await closed.wait()
+        finally:
+            watcher.cancel()
+
+    async def _read_until_close(self, reader, writer, closed):
+        """Answer pings and close frames of the client; the payload of other frames is ignored."""
+        try:
+            while True:
+                first, second = await reader.readexactly(2)
+                length = second & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", await reader.readexactly(8))[0]
+                mask = await reader.readexactly(4) if second & 0x80 else b""
+                payload = await reader.readexactly(length)
+                if mask:
+                    payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+
+                opcode = first & 0x0F
+                if opcode == 0x8:
+                    writer.write(websocket_frame(payload[:2], opcode=0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(websocket_frame(payload, opcode=0xA))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            closed.set()
+
+
+def _serve_process(options, ports, streams):
+    server = StandInServer(on_stream=streams.put, **options)
+
+    async def serve():
+        await server.start()
+        ports.put(server.port)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def children_cpu_seconds():
+    """CPU time of the finished child processes (the browser and the Playwright driver), or None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_load_test(frames=FRAMES, rate=RATE, payload_size=0, ticks=1, seed=0, capture_format="jsonl", dedup=True,
+                  background_writer=False, browser_visible=False, cdp_url=None, idle_timeout=2.0):
+    """Capture the stream of a `StandInServer` in another process end to end and measure it.
+
+    The capture runs exactly as `codenames_analyzer.py capture` would, into
+    a temporary capture file and without the game history. The latency of a
+    frame is the time from its send time to its arrival in the capture
+    process (the `timestamp` of the capture); the queue delay is the time it
+    then waited for the frame consumer.
+    """
+    from codenames_analyzer import BrowserOptions, StorageOptions, WaitOptions, capture_websocket_data
+    from capture_reader import iter_frames
+    from metrics import Metrics
+
+    ports = multiprocessing.Queue()
+    streams = multiprocessing.Queue()
+    options = dict(frames=frames, rate=rate, payload_size=payload_size, ticks=ticks, seed=seed, port=0)
+    server = multiprocessing.Process(target=_serve_process, args=(options, ports, streams), daemon=True)
+    server.start()
+    try:
+        url = f"http://{HOST}:{ports.get(timeout=60)}/"
+        metrics = Metrics()
+        with tempfile.TemporaryDirectory() as directory:
+            capture_file = os.path.join(directory, "load_test.capture")
+            children_cpu = children_cpu_seconds()
+            started_at = time.perf_counter()
+            cpu_started_at = time.process_time()
+            capture_websocket_data(
+                url, username="LoadTest", browser=BrowserOptions(browser_visible, cdp_url=cdp_url),
+                waiting=WaitOptions(frames / rate + 60, stop_on_board=False, stop_on_game_over=False,
+                                    idle_timeout=idle_timeout, confirm_setup=False),
+                storage=StorageOptions(capture_format, capture_file, background_writer, dedup, history_file=None),
+                metrics=metrics)
+            cpu_seconds = time.process_time() - cpu_started_at
+            wall_seconds = time.perf_counter() - started_at
+            browser_cpu_seconds = None
+            if children_cpu is not None:
+                browser_cpu_seconds = children_cpu_seconds() - children_cpu
+
+            latencies = sorted(frame["timestamp"] - frame["G"]["sentAt"] for frame in iter_frames(capture_file)
+                               if "sentAt" in frame["G"])
+        stream = streams.get(timeout=10)
+    finally:
+        server.terminate()
+        server.join()
+
+    counters = metrics.counters
+    return LoadTestResult(stream.frames, stream.bytes, stream.seconds, counters.get("game_states", 0),
+                          counters.get("frames_duplicate", 0), counters.get("frames_written", 0), latencies,
+                          metrics.stages.get("capture"), wall_seconds, cpu_seconds, browser_cpu_seconds, metrics)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+def print_result(result):
+    lost = result.sent - result.received
+    print(f"Sent:      {result.sent} frames, {result.sent_bytes / 1e6:.1f} MB in {result.send_seconds:.2f} s "
+          f"({result.sent / result.send_seconds:.0f} frames/s)")
+    print(f"Received:  {result.received} game states ({lost} lost, {lost / result.sent:.2%}), "
+          f"{result.duplicates} repeated, {result.written} written")
+    if result.latencies:
+        points = ", ".join(f"p{int(fraction * 100)} {percentile(result.latencies, fraction) * 1e3:.2f} ms"
+                           for fraction in (0.5, 0.9, 0.99))
+        print(f"Latency:   {points}, max {result.latencies[-1] * 1e3:.2f} ms "
+              f"(send to capture, {len(result.latencies)} stored frames)")
+    if result.queue_delay:
+        queue_delay = result.queue_delay
+        print(f"Queue:     p50 <= {queue_delay.percentile(0.5)} us, p99 <= {queue_delay.percentile(0.99)} us "
+              f"(capture to consumer)")
+    print(f"CPU:       {result.cpu_seconds:.2f} s capture process ({result.cpu_seconds / result.wall_seconds:.0%} "
+          f"of one core over {result.wall_seconds:.1f} s)")
+    if result.browser_cpu_seconds is not None:
+        print(f"           {result.browser_cpu_seconds:.2f} s browser and driver")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Codenames stand-in server and capture load test')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stream = argparse.ArgumentParser(add_help=False)
+    stream.add_argument('--frames', type=int, default=FRAMES, help='Game state frames per WebSocket')
+    stream.add_argument('--rate', type=float, default=RATE, help='Frames per second')
+    stream.add_argument('--payload-size', type=int, default=0,
+                        help='Pad frames to about this many bytes (default: unpadded, about 7 KB)')
+    stream.add_argument('--ticks', type=int, default=1, help='Repeated frames per game state')
+    stream.add_argument('--seed', type=int, default=0, help='Random seed of the simulated games')
+
+    serve_parser = subparsers.add_parser('serve', parents=[stream], help='Run the stand-in server')
+    serve_parser.add_argument('--host', default=HOST, help='Address to listen on')
+    serve_parser.add_argument('--port', type=int, default=PORT, help='Port to listen on')
+
+    run_parser = subparsers.add_parser('run', parents=[stream], help='Capture from the stand-in server and report')
+    run_parser.add_argument('--format', choices=CAPTURE_FORMATS, default='jsonl', help='Capture storage format')
+    run_parser.add_argument('--no-dedup', dest='dedup', action='store_false', help='Store repeated game states')
+    run_parser.add_argument('--background-writer', action='store_true',
+                            help='Write captured frames to disk from a background thread')
+    run_parser.add_argument('--browser', action='store_true', help='Run the browser in visible mode')
+    run_parser.add_argument('--cdp', type=str, help='Attach to a running Chromium over CDP instead of launching')
+    run_parser.add_argument('--idle-timeout', type=float, default=2.0,
+                            help='Stop the capture this many seconds after the last game state')
+    run_parser.add_argument('--metrics', metavar='FILE', help='Write the capture metrics as JSON')
+    run_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        def print_stream(stats):
+            print(f"Sent {stats.frames} frames ({stats.bytes / 1e6:.1f} MB) in {stats.seconds:.2f} seconds")
+
+        server = StandInServer(args.frames, args.rate, args.payload_size, args.ticks, args.seed, args.host,
+                               args.port, on_stream=print_stream)
+        print(f"Serving {server.url} ({len(server.frames)} frames at {args.rate:g} frames/s per connection)")
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    result = run_load_test(args.frames, args.rate, args.payload_size, args.ticks, args.seed, args.format,
+                           args.dedup, args.background_writer, args.browser, args.cdp, args.idle_timeout)
+    if args.metrics:
+        result.metrics.write(args.metrics)
+    if args.json:
+        report = result._asdict()
+        report["latencies"] = {f"p{int(fraction * 100)}_ms": round(percentile(result.latencies, fraction) * 1e3, 3)
+                               for fraction in (0.5, 0.9, 0.99)} if result.latencies else None
+        report["queue_delay"] = result.queue_delay.to_dict() if result.queue_delay else None
+        del report["metrics"]
+        print(json.dumps(report, indent=2))
+    else:
+        print_result(result)
+
+
+if __name__ == "__main__":
+    main()
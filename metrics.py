@@ -0,0 +1,133 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Upper bounds of the histogram buckets in microseconds; the last bucket is open
+BUCKET_BOUNDS_US = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000,
+                    1000000)
+
+
+class Histogram:
+    """Timing histogram with fixed logarithmic buckets, cheap enough to update on every frame."""
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_US) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(BUCKET_BOUNDS_US, seconds * 1e6)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Upper bound in microseconds of the bucket holding the given fraction of the observations."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_US, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return round(self.max * 1e6, 1)
+
+    def to_dict(self):
+        labels = [f"<={bound}us" for bound in BUCKET_BOUNDS_US] + [f">{BUCKET_BOUNDS_US[-1]}us"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1e3, 3),
+            "mean_us": round(self.total / self.count * 1e6, 1) if self.count else None,
+            "min_us": round(self.min * 1e6, 1) if self.count else None,
+            "max_us": round(self.max * 1e6, 1) if self.count else None,
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+            "buckets": {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+
+class StageTimer:
+    __slots__ = ("metrics", "stage", "started_at")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started_at)
+        return False
+
+
+class Metrics:
+    """Counters and per-stage timing histograms of one run.
+
+    Stages are timed with `timer(stage)` or reported with `observe`, counters
+    are increased with `count`. `write` dumps everything as JSON.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.counters = {}
+        self.stages = {}
+        self.started_at = time.perf_counter()
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def timer(self, stage):
+        return StageTimer(self, stage)
+
+    def to_dict(self):
+        return {
+            "elapsed_seconds": round(time.perf_counter() - self.started_at, 3),
+            "counters": dict(sorted(self.counters.items())),
+            "stages": {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+        }
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+class NullMetrics:
+    """Stand-in for `Metrics` when metrics are disabled; every call does nothing."""
+
+    enabled = False
+    _timer = nullcontext()
+
+    def count(self, name, value=1):
+        pass
+
+    def observe(self, stage, seconds):
+        pass
+
+    def timer(self, stage):
+        return self._timer
+
+
+NULL_METRICS = NullMetrics()
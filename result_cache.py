@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from board_state import hidden_cards
+
+MEMORY_ENTRIES = 128
+MAX_DISK_BYTES = 16 * 1024 * 1024
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def board_key(card_data, team, language, *extra, include_neutral=False):
+    """Canonical hash of the board inputs of `generate_ai_prompt`.
+
+    Covers the hidden own-team, opponent and assassin words, the team and the
+    language; word order does not matter. Hidden neutral words are added with
+    `include_neutral`, and `extra` values (e.g. the word vectors used) are
+    appended as they are.
+    """
+    cards = hidden_cards(card_data, team)
+    key = {
+        "own": sorted(cards.own),
+        "opponent": sorted(cards.opponent),
+        "assassin": sorted(cards.assassin),
+        "team": team,
+        "language": language,
+        "extra": list(extra),
+    }
+    if include_neutral:
+        key["neutral"] = sorted(cards.neutral)
+    return _digest(key)
+
+
+def capture_key(path):
+    """Key of a capture file that changes whenever the file does."""
+    stat = os.stat(path)
+    return _digest([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+
+
+class ResultCache:
+    """Two-level cache of analysis results: an in-memory LRU over a sqlite file.
+
+    Entries are addressed by a kind ("board", "prompt", "clues", ...) and a key
+    such as `board_key`. Values are stored as JSON. The on-disk store is capped
+    at `max_disk_bytes`; the least recently used entries are evicted first.
+    Without a path only the in-memory level is used.
+    """
+
+    def __init__(self, path=None, memory_entries=MEMORY_ENTRIES, max_disk_bytes=MAX_DISK_BYTES):
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._memory = OrderedDict()
+        self._db = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (kind TEXT NOT NULL, key TEXT NOT NULL, "
+                             "value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL, "
+                             "PRIMARY KEY (kind, key))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._db.commit()
+
+    @property
+    def hits(self):
+        return self.stats["memory_hits"] + self.stats["disk_hits"]
+
+    @property
+    def misses(self):
+        return self.stats["misses"]
+
+    def get(self, kind, key):
+        """Return the cached value, or None on a miss."""
+        entry = (kind, key)
+        if entry in self._memory:
+            self._memory.move_to_end(entry)
+            self.stats["memory_hits"] += 1
+            return self._memory[entry]
+
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM results WHERE kind = ? AND key = ?", entry).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE results SET accessed = ? WHERE kind = ? AND key = ?", (time.time(),) + entry)
+                self._db.commit()
+                value = json.loads(row[0])
+                self._remember(entry, value)
+                self.stats["disk_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, kind, key, value):
+        entry = (kind, key)
+        self._remember(entry, value)
+
+        if self._db is not None:
+            data = json.dumps(value, ensure_ascii=False)
+            self._db.execute("INSERT OR REPLACE INTO results (kind, key, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                             entry + (data, len(data.encode("utf-8")), time.time()))
+            self._evict()
+            self._db.commit()
+
+    def get_or_compute(self, kind, key, compute):
+        """Return the cached value or compute and store it; None results are not cached."""
+        value = self.get(kind, key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(kind, key, value)
+        return value
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, entry, value):
+        self._memory[entry] = value
+        self._memory.move_to_end(entry)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+
+        evicted = []
+        for kind, key, size in self._db.execute("SELECT kind, key, size FROM results ORDER BY accessed"):
+            if total <= self.max_disk_bytes:
+                break
+            evicted.append((kind, key))
+            total -= size
+        self._db.executemany("DELETE FROM results WHERE kind = ? AND key = ?", evicted)
+        self.stats["evictions"] += len(evicted)
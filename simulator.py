@@ -0,0 +1,214 @@
+import argparse
+import json
+import random
+import time
+
+from board_state import BOARD_SIZE, BOARD_WIDTH, BoardState
+from capture_dedup import CaptureDeduplicator
+from capture_format import CAPTURE_FORMATS, open_capture_sink
+from capture_reader import iter_frames
+from metrics import NULL_METRICS, Metrics
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "bu", "sor", "vel", "an", "de", "pi", "gor", "na", "lu", "ser", "to"]
+SIMULATED_URL = "wss://codenames.game/socket.io/?EIO=4&transport=websocket"
+
+
+def make_word_list(size=400, seed=0):
+    """Build a deterministic list of pronounceable fake board words."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).upper())
+    return sorted(words)
+
+
+def new_board(rng, words):
+    """Pick the words and colors of a new board; the starting team gets 9 cards."""
+    starting_team = rng.choice(["red", "blue"])
+    other_team = "blue" if starting_team == "red" else "red"
+    colors = [starting_team] * 9 + [other_team] * 8 + ["gray"] * 7 + ["black"]
+    rng.shuffle(colors)
+    return rng.sample(words, BOARD_SIZE), colors, starting_team
+
+
+def make_game_state(match_id, board_words, colors, revealed, current_team, game_over=False, winner=None):
+    """Build a `G` snapshot with word and cover card tokens for every position."""
+    anim_tokens = []
+    for position, (word, color) in enumerate(zip(board_words, colors)):
+        location = {"name": "board", "x": position % BOARD_WIDTH, "y": position // BOARD_WIDTH}
+        anim_tokens.append({"type": "wordCard", "id": f"wordCard/{position}", "location": location,
+                            "data": {"word": word, "revealed": revealed[position]}})
+        anim_tokens.append({"type": "coverCard", "id": f"coverCard/{color}/{position}", "location": location,
+                            "data": {"visible": revealed[position]}})
+
+    score = {team: sum(1 for color, is_revealed in zip(colors, revealed) if color == team and not is_revealed)
+             for team in ("red", "blue")}
+    return {"matchID": match_id, "currentTeam": current_team, "score": score, "gameOver": game_over,
+            "winner": winner, "animTokens": anim_tokens}
+
+
+def simulate_game(rng, words, match_id, ticks=3, accuracy=0.7):
+    """Play one random game and yield a `G` snapshot for every state.
+
+    Each state is repeated `ticks` times, like the re-broadcasts the real server
+    sends for animations. A guesser picks one of its own cards with
+    probability `accuracy` and a random unrevealed card otherwise.
+    """
+    board_words, colors, current_team = new_board(rng, words)
+    revealed = [False] * BOARD_SIZE
+    game_over = False
+    winner = None
+
+    while True:
+        game_data = make_game_state(match_id, board_words, colors, revealed, current_team, game_over, winner)
+        for _ in range(ticks):
+            yield game_data
+        if game_over:
+            return
+
+        hidden = [position for position in range(BOARD_SIZE) if not revealed[position]]
+        own = [position for position in hidden if colors[position] == current_team]
+        position = rng.choice(own) if own and rng.random() < accuracy else rng.choice(hidden)
+        revealed[position] = True
+
+        other_team = "blue" if current_team == "red" else "red"
+        if colors[position] == "black":
+            game_over, winner = True, other_team
+        elif all(revealed[p] for p in range(BOARD_SIZE) if colors[p] == current_team):
+            game_over, winner = True, current_team
+        elif all(revealed[p] for p in range(BOARD_SIZE) if colors[p] == other_team):
+            game_over, winner = True, other_team
+        elif colors[position] != current_team:
+            current_team = other_team
+
+
+def synthetic_game_states(count, seed=0, ticks=3):
+    """Yield `count` `G` snapshots from consecutive simulated games."""
+    rng = random.Random(seed)
+    words = make_word_list(seed=seed)
+    produced = 0
+    game_number = 0
+    while True:
+        for game_data in simulate_game(rng, words, f"sim-{seed}-{game_number}", ticks=ticks):
+            if produced >= count:
+                return
+            yield game_data
+            produced += 1
+        game_number += 1
+
+
+def encode_frame(game_data):
+    """Wrap a `G` snapshot into a raw `42/codenames` socket.io frame."""
+    return "42/codenames," + json.dumps(["update", game_data["matchID"], {"G": game_data}])
+
+
+def synthetic_frames(count, seed=0, ticks=3):
+    """Yield `count` raw `42/codenames` frames from consecutive simulated games."""
+    for game_data in synthetic_game_states(count, seed=seed, ticks=ticks):
+        yield encode_frame(game_data)
+
+
+def write_capture(path, count, seed=0, ticks=3, capture_format="jsonl", interval=0.05, dedup=False):
+    """Write a synthetic capture file, one frame every `interval` seconds.
+
+    With `dedup` repeated game states are dropped as during a capture, see
+    `CaptureDeduplicator`. Returns the number of frames written.
+    """
+    started_at = time.time()
+    with open_capture_sink(path, capture_format, mode="w", flush_size=1024) as sink, \
+            CaptureDeduplicator(sink, enabled=dedup) as deduplicator:
+        for number, game_data in enumerate(synthetic_game_states(count, seed=seed, ticks=ticks)):
+            deduplicator.add({"url": SIMULATED_URL, "data": encode_frame(game_data),
+                              "timestamp": started_at + number * interval}, game_data)
+    return sink.written
+
+
+def replay(frames, speed=0, on_board=None, metrics=NULL_METRICS):
+    """Feed captured frames through the board pipeline.
+
+    `frames` are dicts with `timestamp` and `G`, as produced by `iter_frames`.
+    With a positive `speed` the original timing is reproduced at that multiple;
+    0 replays as fast as possible. `on_board` is called with the card data
+    whenever the board changes. Counters and stage timings are recorded in
+    `metrics`. Returns the final `BoardState`.
+    """
+    board = BoardState()
+    fingerprint = None
+    previous_timestamp = None
+    for frame in frames:
+        timestamp = frame.get("timestamp")
+        if speed > 0 and previous_timestamp is not None and timestamp is not None:
+            delay = (timestamp - previous_timestamp) / speed
+            if delay > 0:
+                time.sleep(delay)
+        previous_timestamp = timestamp
+
+        received_at = time.perf_counter()
+        metrics.count("game_states")
+        with metrics.timer("evaluate"):
+            applied = board.apply(frame["G"])
+        if applied and on_board and board.fingerprint != fingerprint:
+            fingerprint = board.fingerprint
+            with metrics.timer("evaluate"):
+                card_data = board.card_data()
+            on_board(card_data)
+            metrics.observe("frame_to_board", time.perf_counter() - received_at)
+            metrics.count("board_updates")
+    return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Codenames capture simulator')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help='Write a synthetic capture file')
+    generate_parser.add_argument('output', help='Capture file to write')
+    generate_parser.add_argument('--frames', type=int, default=1000, help='Number of frames')
+    generate_parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    generate_parser.add_argument('--ticks', type=int, default=3, help='Repeated frames per game state')
+    generate_parser.add_argument('--format', choices=CAPTURE_FORMATS, default='jsonl', help='Capture storage format')
+    generate_parser.add_argument('--dedup', action='store_true', help='Drop repeated game states as during a capture')
+
+    replay_parser = subparsers.add_parser('replay', help='Replay a recorded or synthetic capture')
+    replay_parser.add_argument('capture', help='Capture file to replay')
+    replay_parser.add_argument('--speed', type=float, default=0,
+                               help='Playback speed multiple, 0 for as fast as possible')
+    replay_parser.add_argument('--team', choices=['red', 'blue'], default='red', help='Team for the AI prompt')
+    replay_parser.add_argument('--lang', default='en', help='Language of the AI prompt')
+    replay_parser.add_argument('--quiet', action='store_true', help='Do not print the board on every change')
+    replay_parser.add_argument('--metrics', type=str, help='Write counters and stage timings as JSON to this file')
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        written = write_capture(args.output, args.frames, seed=args.seed, ticks=args.ticks,
+                                capture_format=args.format, dedup=args.dedup)
+        print(f"Wrote {written} frames to {args.output}")
+        return
+
+    from codenames_analyzer import console, generate_ai_prompt, print_card_colors
+
+    changes = 0
+    metrics = Metrics() if args.metrics else NULL_METRICS
+
+    def show_board(card_data):
+        nonlocal changes
+        changes += 1
+        if not args.quiet:
+            with metrics.timer("render"):
+                print_card_colors(card_data)
+        with metrics.timer("prompt"):
+            generate_ai_prompt(card_data, args.team, args.lang)
+
+    started_at = time.perf_counter()
+    board = replay(iter_frames(args.capture), speed=args.speed, on_board=show_board, metrics=metrics)
+    elapsed = time.perf_counter() - started_at
+    if metrics.enabled:
+        metrics.write(args.metrics)
+
+    rate = board.snapshot_count / elapsed if elapsed else 0
+    console.print(f"[bold green]Replayed {board.snapshot_count} snapshots ({changes} board changes) "
+                  f"in {elapsed:.3f} seconds, {rate:.0f} frames/s[/bold green]")
+
+
+if __name__ == "__main__":
+    main()
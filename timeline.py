@@ -0,0 +1,163 @@
+import json
+import os
+from collections import namedtuple
+
+from board_state import BoardState, other_team
+from capture_reader import iter_frames
+from capture_sink import CaptureSink
+
+TIMELINE_SUFFIX = ".timeline"
+EVENT_KINDS = ("game", "reveal", "turn", "game_over")
+
+# `team` is the starting team for "game", the revealing team for "reveal",
+# the new team for "turn" and the winner (if known) for "game_over"
+TimelineEvent = namedtuple("TimelineEvent", ["timestamp", "kind", "match_id", "team", "position", "word", "color"])
+Turn = namedtuple("Turn", ["match_id", "number", "team", "started", "ended", "duration", "reveals"])
+
+
+def timeline_path(capture_path):
+    """Path of the timeline stored next to a capture file."""
+    return capture_path + TIMELINE_SUFFIX
+
+
+class TimelineBuilder:
+    """Turn a stream of `G` snapshots into game, reveal, turn and game over events.
+
+    Each snapshot is compared to the previous one through the fingerprint of
+    its `BoardState` (revealed bitmask, scores, current team, game over), so an
+    unchanged snapshot costs one tuple comparison and a changed one is diffed
+    in O(changed cards): only the newly set bits of the revealed bitmask are
+    visited. Cards already revealed in the first snapshot of a game are not
+    reported, their reveal time is unknown.
+    """
+
+    def __init__(self):
+        self._fingerprint = None
+        self._assassin_team = None
+
+    def resume(self, state):
+        """Continue from a snapshot observed earlier, such as the last one of a capture that is appended to.
+
+        The next snapshot of the same match is then diffed against it instead
+        of starting the match over with a "game" event.
+        """
+        self._fingerprint = state.fingerprint
+        self._assassin_team = None
+
+    def observe(self, state, timestamp):
+        """Return the events caused by the latest snapshot applied to `state`."""
+        fingerprint = state.fingerprint
+        previous = self._fingerprint
+        if fingerprint is None or fingerprint == previous:
+            return []
+        self._fingerprint = fingerprint
+        match_id, revealed, _, _, team, game_over, _ = fingerprint
+
+        if previous is None or match_id != previous[0]:
+            self._assassin_team = None
+            return [TimelineEvent(timestamp, "game", match_id, team, None, None, None)]
+
+        events = []
+        newly_revealed = revealed & ~previous[1]
+        if newly_revealed:
+            board = state.board()
+            revealing_team = previous[4]
+            while newly_revealed:
+                low_bit = newly_revealed & -newly_revealed
+                newly_revealed ^= low_bit
+                position = low_bit.bit_length() - 1
+                color = board.color_at(position)
+                if color == "black":
+                    self._assassin_team = revealing_team
+                events.append(TimelineEvent(timestamp, "reveal", match_id, revealing_team, position,
+                                            board.word_at(position), color))
+
+        if game_over and not previous[5]:
+            events.append(TimelineEvent(timestamp, "game_over", match_id, self._winner(state), None, None, None))
+        elif team != previous[4] and not game_over:
+            events.append(TimelineEvent(timestamp, "turn", match_id, team, None, None, None))
+        return events
+
+    def _winner(self, state):
+        winner = state.game_data.get("winner")
+        if winner is None:
+            board = state.board()
+            if board.red_remaining == 0 or board.blue_remaining == 0:
+                winner = "red" if board.red_remaining == 0 else "blue"
+            elif self._assassin_team:
+                winner = other_team(self._assassin_team)
+        return winner
+
+
+def iter_capture_events(path):
+    """Stream the timeline events of a capture file."""
+    state = BoardState()
+    builder = TimelineBuilder()
+    for frame in iter_frames(path):
+        if state.apply(frame["G"]):
+            yield from builder.observe(state, frame.get("timestamp"))
+
+
+def write_timeline(events, path):
+    """Write events as one compact JSON array per line; returns the number written."""
+    with CaptureSink(path, mode="w", flush_size=1024) as sink:
+        for event in events:
+            sink.write(event)
+    return sink.written
+
+
+def read_timeline(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [TimelineEvent(*json.loads(line)) for line in f if line.strip()]
+
+
+def load_timeline(capture_path, rebuild=False):
+    """Events of a capture, read from its stored timeline.
+
+    The timeline is rebuilt from the capture and stored next to it when it is
+    missing, older than the capture or `rebuild` is set.
+    """
+    path = timeline_path(capture_path)
+    if not rebuild and os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(capture_path):
+        return read_timeline(path)
+
+    events = list(iter_capture_events(capture_path))
+    write_timeline(events, path)
+    return events
+
+
+def turns(events):
+    """Group events into turns with their start, end, duration and revealed words.
+
+    A turn starts with the "game" or "turn" event and ends with the next
+    "turn" or "game_over" event of the same game; the last turn of an
+    unfinished game has no end.
+    """
+    result = []
+    current = None
+    number = 0
+
+    def close(ended):
+        if current is not None:
+            match_id, turn_number, team, started, reveals = current
+            duration = ended - started if ended is not None and started is not None else None
+            result.append(Turn(match_id, turn_number, team, started, ended, duration, reveals))
+
+    for event in events:
+        if event.kind == "game":
+            close(None)
+            number = 1
+            current = (event.match_id, number, event.team, event.timestamp, [])
+        elif current is None or event.match_id != current[0]:
+            continue
+        elif event.kind == "reveal":
+            current[4].append(event.word)
+        elif event.kind == "turn":
+            close(event.timestamp)
+            number += 1
+            current = (event.match_id, number, event.team, event.timestamp, [])
+        elif event.kind == "game_over":
+            close(event.timestamp)
+            current = None
+    close(None)
+    return result
@@ -0,0 +1,191 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from board_state import hidden_cards, other_team
+
+PLAYOUTS = 200000
+ACCURACY = 0.7
+CLUE_SIZE = 2
+CHUNK_PLAYOUTS = 1 << 18
+
+TEAMS = ("red", "blue")
+OUTCOMES = ("own", "opponent", "neutral", "assassin")
+
+WinEstimate = namedtuple("WinEstimate", ["red", "blue", "playouts", "seconds"])
+ClueRisk = namedtuple("ClueRisk", ["count", "all_correct", "expected_correct", "opponent", "neutral", "assassin",
+                                   "win", "playouts"])
+
+
+def hidden_counts(card_data):
+    """Return the hidden red, blue, neutral and assassin cards of the card data of `evaluate_card_colors`."""
+    cards = hidden_cards(card_data, "red")
+    return len(cards.own), len(cards.opponent), len(cards.neutral), len(cards.assassin)
+
+
+def _playouts(counts, team, playouts, accuracy, clue_size, first_guesses, seed):
+    """Play `playouts` games from the same position at once, one NumPy step per guess.
+
+    Every playout is a column of small integer arrays (own, opponent, neutral
+    and assassin cards of the team on turn, the guesses left in the turn).
+    Finished playouts stay in the arrays with their hits masked out and are
+    dropped once fewer than half of them are still running. Returns the number
+    of red and blue wins, for the first turn the number of playouts ending it
+    with each outcome of `OUTCOMES` (own meaning every guess was correct), and
+    the total of correct first-turn guesses.
+    """
+    rng = np.random.default_rng(seed)
+    accuracy = np.float32(accuracy)
+    miss_rate = np.float32(1) - accuracy
+    blue_first = team == "blue"
+    own = np.full(playouts, counts[1] if blue_first else counts[0], dtype=np.int8)
+    opponent = np.full(playouts, counts[0] if blue_first else counts[1], dtype=np.int8)
+    gray = np.full(playouts, counts[2], dtype=np.int8)
+    black = np.full(playouts, counts[3], dtype=np.int8)
+    blue_turn = np.full(playouts, blue_first)
+    guesses_left = np.full(playouts, first_guesses, dtype=np.int8)
+    first_turn = np.ones(playouts, dtype=bool)
+    active = np.ones(playouts, dtype=bool)
+    running = playouts
+
+    wins = [0, 0]
+    first_outcomes = [0] * len(OUTCOMES)
+    first_correct = 0
+
+    while running:
+        noise = miss_rate / (own + opponent + gray + black)
+        p_own = accuracy + noise * own
+        p_opponent = p_own + noise * opponent
+        p_gray = p_opponent + noise * gray
+
+        draw = rng.random(len(own), dtype=np.float32)
+        hit_own = (draw < p_own) & active
+        below_opponent = draw < p_opponent
+        hit_opponent = below_opponent & ~hit_own & active
+        below_gray = draw < p_gray
+        hit_gray = below_gray & ~below_opponent & active
+        hit_black = ~below_gray & (black > 0) & active
+
+        own -= hit_own
+        opponent -= hit_opponent
+        gray -= hit_gray
+        guesses_left -= 1
+
+        turn_over = ~hit_own | (guesses_left == 0)
+        if first_turn.any():
+            ending = first_turn & turn_over
+            first_correct += int(np.count_nonzero(first_turn & hit_own))
+            first_outcomes[0] += int(np.count_nonzero(ending & hit_own))
+            first_outcomes[1] += int(np.count_nonzero(ending & hit_opponent))
+            first_outcomes[2] += int(np.count_nonzero(ending & hit_gray))
+            first_outcomes[3] += int(np.count_nonzero(ending & hit_black))
+            first_turn &= ~turn_over
+
+        team_won = (own == 0) & active
+        opponent_won = ((opponent == 0) | hit_black) & active
+        blue_won = int(np.count_nonzero(team_won & blue_turn)) + int(np.count_nonzero(opponent_won & ~blue_turn))
+        finished = int(np.count_nonzero(team_won | opponent_won))
+        wins[0] += finished - blue_won
+        wins[1] += blue_won
+        active &= ~(team_won | opponent_won)
+        running -= finished
+
+        swap = (opponent - own) * turn_over
+        own += swap
+        opponent -= swap
+        blue_turn ^= turn_over
+        guesses_left += (clue_size - guesses_left) * turn_over
+
+        if running and running < len(own) // 2:
+            keep = np.flatnonzero(active)
+            own, opponent, gray, black = own[keep], opponent[keep], gray[keep], black[keep]
+            blue_turn, guesses_left, first_turn, active = (blue_turn[keep], guesses_left[keep], first_turn[keep],
+                                                           active[keep])
+
+    return wins, first_outcomes, first_correct
+
+
+def _run_chunk(arguments):
+    return _playouts(*arguments)
+
+
+def simulate(counts, team, playouts=PLAYOUTS, accuracy=ACCURACY, clue_size=CLUE_SIZE, first_guesses=None,
+             workers=None, seed=None):
+    """Run Monte Carlo playouts from hidden card counts and return the summed results of `_playouts`.
+
+    The playouts are split into chunks of `CHUNK_PLAYOUTS` with independent
+    random streams; with `workers` above 1 the chunks run in a process pool.
+    """
+    first_guesses = first_guesses or clue_size
+    chunk_sizes = [min(CHUNK_PLAYOUTS, playouts - start) for start in range(0, playouts, CHUNK_PLAYOUTS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    chunks = [(counts, team, size, accuracy, clue_size, first_guesses, chunk_seed)
+              for size, chunk_seed in zip(chunk_sizes, seeds)]
+
+    if workers and workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_chunk, chunks))
+    else:
+        results = [_run_chunk(chunk) for chunk in chunks]
+
+    wins = [sum(result[0][index] for result in results) for index in range(2)]
+    first_outcomes = [sum(result[1][index] for result in results) for index in range(len(OUTCOMES))]
+    first_correct = sum(result[2] for result in results)
+    return wins, first_outcomes, first_correct
+
+
+def _position(card_data, team):
+    counts = hidden_counts(card_data)
+    team = team or card_data.get("turn")
+    if team not in TEAMS:
+        raise ValueError(f"Unknown team to play: {team}")
+    return counts, team
+
+
+def _winner(card_data, counts):
+    """The winner of a finished game, or None while both teams have hidden cards."""
+    if counts[0] == 0 or counts[1] == 0:
+        return "red" if counts[0] == 0 else "blue"
+    if card_data.get("game_over"):
+        if card_data.get("black_card") and counts[3] == 0:
+            # The team on turn revealed the assassin
+            return other_team(card_data.get("turn"))
+        return "red" if card_data.get("red_remaining", 0) <= card_data.get("blue_remaining", 0) else "blue"
+    return None
+
+
+def estimate_win_probability(card_data, team=None, playouts=PLAYOUTS, accuracy=ACCURACY, clue_size=CLUE_SIZE,
+                             workers=None, seed=None):
+    """Estimate the win probability of both teams from the board, with `team` (default: the team on turn) to play.
+
+    Guessers reveal one of their own cards with probability `accuracy` and a
+    uniformly random hidden card otherwise, and guess up to `clue_size` cards
+    per turn, stopping at the first miss.
+    """
+    started_at = time.perf_counter()
+    counts, team = _position(card_data, team)
+    winner = _winner(card_data, counts)
+    if winner:
+        return WinEstimate(float(winner == "red"), float(winner == "blue"), 0, 0.0)
+
+    wins, _, _ = simulate(counts, team, playouts, accuracy, clue_size, workers=workers, seed=seed)
+    return WinEstimate(wins[0] / playouts, wins[1] / playouts, playouts, time.perf_counter() - started_at)
+
+
+def clue_risk(card_data, count, team=None, playouts=PLAYOUTS, accuracy=ACCURACY, clue_size=CLUE_SIZE,
+              workers=None, seed=None):
+    """Estimate the outcome of a clue for `count` cards given to `team` (default: the team on turn).
+
+    Returns the probabilities that every guess is correct or that the turn
+    ends on an opponent, neutral or assassin card, the expected number of
+    correct guesses and the win probability of `team` after the clue.
+    """
+    counts, team = _position(card_data, team)
+    if _winner(card_data, counts):
+        raise ValueError("The game is over")
+    wins, outcomes, correct = simulate(counts, team, playouts, accuracy, clue_size, first_guesses=count,
+                                       workers=workers, seed=seed)
+    return ClueRisk(count, outcomes[0] / playouts, correct / playouts, outcomes[1] / playouts,
+                    outcomes[2] / playouts, outcomes[3] / playouts, wins[TEAMS.index(team)] / playouts, playouts)